@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List, Optional
 import logging
-from app.services.cache_service import CacheService
+from app.services.cache_service import get_cache_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/cache", tags=["cache"])
 
 # Global cache service instance
-cache_service = CacheService()
+cache_service = get_cache_service()
 
 @router.get("/stats")
 async def get_cache_statistics() -> Dict[str, Any]:
@@ -6,7 +6,7 @@ from datetime import datetime
 from pydantic import BaseModel
 
 from ..services.assistant_service import AssistantService
-from ..services.guardrails_service import GuardrailsService
+from ..services.guardrails_service import get_guardrails_service
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +14,6 @@ router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 # Lazy initialization - only create when needed
 _assistant_service = None
-_guardrails_service = None
 
 def get_assistant_service():
     global _assistant_service
@@ -22,12 +21,6 @@ def get_assistant_service():
         _assistant_service = AssistantService()
     return _assistant_service
 
-def get_guardrails_service():
-    global _guardrails_service
-    if _guardrails_service is None:
-        _guardrails_service = GuardrailsService()
-    return _guardrails_service
-
 class ChatMessage(BaseModel):
     message: str
 
@@ -37,7 +30,7 @@ async def send_message(chat_message: ChatMessage) -> Dict[str, Any]:
     try:
         # 1. Guardrail check on user input
         guardrails_service = get_guardrails_service()
-        guardrail_result = guardrails_service.check_text(chat_message.message)
+        guardrail_result = await guardrails_service.check_text(chat_message.message)
         
         if guardrail_result["status"] != "safe":
             logger.warning(f"Message blocked by guardrails: {guardrail_result}")
@@ -77,7 +70,7 @@ async def chat_health_check() -> Dict[str, Any]:
         
         # Test guardrails
         test_message = "Hello"
-        guardrail_result = guardrails_service.check_text(test_message)
+        guardrail_result = await guardrails_service.check_text(test_message)
         
         # Test with a simple message
         response = await assistant_service.process_message("Hello")
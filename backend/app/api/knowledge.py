@@ -29,9 +29,9 @@ async def rebuild_knowledge_base() -> Dict[str, Any]:
 async def get_knowledge_status() -> Dict[str, Any]:
     """Get the current status of the knowledge base"""
     try:
-        from app.services.pinecone_service import PineconeService
+        from app.services.pinecone_service import get_pinecone_service
         
-        pinecone_service = PineconeService()
+        pinecone_service = get_pinecone_service()
         pinecone_service.initialize_index()
         
         # Get index stats
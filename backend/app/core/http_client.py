@@ -0,0 +1,33 @@
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    logger.info("h2 not installed; shared HTTP client will use HTTP/1.1 keep-alive only.")
+    HTTP2_AVAILABLE = False
+
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Process-wide async HTTP client so outbound API calls reuse pooled TLS connections"""
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        )
+    return _async_http_client
+
+async def close_async_http_client():
+    """Close the shared async HTTP client (called on application shutdown)"""
+    global _async_http_client
+    if _async_http_client is not None and not _async_http_client.is_closed:
+        await _async_http_client.aclose()
+    _async_http_client = None
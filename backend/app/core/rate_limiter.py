@@ -0,0 +1,61 @@
+import asyncio
+import time
+from typing import Dict, Tuple
+
+
+class AsyncTokenBucket:
+    """Async token bucket allowing `rate` acquisitions per `period` seconds."""
+
+    def __init__(self, rate: float, period: float = 60.0):
+        if rate <= 0 or period <= 0:
+            raise ValueError("rate and period must be positive")
+        self.capacity = float(rate)
+        self.refill_per_second = rate / period
+        self._tokens = float(rate)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._last_refill = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available, then consume them"""
+        if amount > self.capacity:
+            # The bucket can never hold that many tokens; waiting would block every other caller forever
+            raise ValueError(f"cannot acquire {amount} tokens from a bucket of capacity {self.capacity}")
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.refill_per_second)
+
+
+class HostRateLimiter:
+    """Per-host token buckets, so a strict host is throttled without slowing requests to other hosts."""
+
+    def __init__(self, host_rates: Dict[str, float], default_rate: float, period: float = 1.0):
+        self.host_rates = {host.lower(): rate for host, rate in host_rates.items()}
+        self.default_rate = default_rate
+        self.period = period
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+
+    def _rate_for(self, host: str) -> Tuple[str, float]:
+        """The configured domain covering `host` (or the host itself) and its rate"""
+        for domain, rate in self.host_rates.items():
+            if host == domain or host.endswith("." + domain):
+                return domain, rate
+        return host, self.default_rate
+
+    async def acquire(self, host: str):
+        """Wait for a request slot on `host` (subdomains share their parent domain's bucket)"""
+        host = host.lower().split(":")[0]
+        key, rate = self._rate_for(host)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = AsyncTokenBucket(rate, self.period)
+        await bucket.acquire()
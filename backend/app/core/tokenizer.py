@@ -0,0 +1,39 @@
+import logging
+import threading
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when tiktoken or its encoding file is unavailable
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_unavailable = False
+_encoding_lock = threading.Lock()
+
+def get_encoding():
+    """cl100k_base encoder, loaded on first use; None if tiktoken is missing or its BPE file cannot be fetched"""
+    global _encoding, _encoding_unavailable
+    if _encoding is not None or _encoding_unavailable:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_unavailable:
+            try:
+                import tiktoken
+                # Downloads the BPE file on first use, so this can fail offline as well as when not installed
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.info(f"tiktoken encoding unavailable ({e}); token counts will be approximated by character count.")
+                _encoding_unavailable = True
+    return _encoding
+
+def truncate_to_tokens(text: str, max_tokens: int, chars_per_token: int = CHARS_PER_TOKEN) -> Tuple[str, int]:
+    """Truncate text to at most `max_tokens` tokens; returns the text and the tokens it uses"""
+    encoding = get_encoding()
+    if encoding is None:
+        text = text[:max_tokens * chars_per_token]
+        return text, -(-len(text) // chars_per_token)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+    return encoding.decode(tokens[:max_tokens]), max_tokens
@@ -2,7 +2,7 @@ import warnings
 import logging
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -26,6 +26,7 @@ logging.getLogger("pydantic").setLevel(logging.ERROR)
 logging.getLogger("firecrawl").setLevel(logging.WARNING)
 
 from app.config import settings
+from app.core.http_client import close_async_http_client
 
 # Import API routes
 from app.api import guardrails, cache, vapi, chat, knowledge
@@ -33,10 +34,18 @@ from app.api import guardrails, cache, vapi, chat, knowledge
 # Set up logging
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The shared async HTTP client is created on first use and lives until shutdown
+    await close_async_http_client()
+
 app = FastAPI(
     title="Aven AI Support Backend",
     description="AI-powered customer support system for Aven",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS
@@ -92,7 +101,7 @@ async def detailed_health_check():
         from app.api.guardrails import get_guardrails_service
         guardrails_service = get_guardrails_service()
         # Test with a simple safe text
-        result = guardrails_service.check_text("Hello")
+        result = await guardrails_service.check_text("Hello")
         health_status["services"]["guardrails"] = "healthy"
     except Exception as e:
         health_status["services"]["guardrails"] = f"unhealthy: {str(e)}"
@@ -7,7 +7,8 @@ and build a complete knowledge base with proper source attribution.
 """
 
 import asyncio
-import json
+import hashlib
+import orjson
 import logging
 import os
 import sys
@@ -70,12 +71,12 @@ async def crawl_and_store():
         
         # Get crawl statistics
         stats = await crawler.get_crawl_statistics()
-        logger.info(f"Crawl statistics: {json.dumps(stats, indent=2)}")
+        logger.info(f"Crawl statistics: {orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode()}")
         
         # Save raw scraped data
         output_file = f"aven_site_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(scraped_data, f, indent=2, ensure_ascii=False)
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(scraped_data, option=orjson.OPT_INDENT_2))
         logger.info(f"Raw scraped data saved to: {output_file}")
         
         # Process and store in vector database
@@ -98,7 +99,7 @@ async def crawl_and_store():
                 
                 # Prepare vector data with proper source attribution
                 vector_data = {
-                    "id": f"aven_{hash(page_data['url'])}",
+                    "id": f"aven_{hashlib.blake2b(page_data['url'].encode('utf-8'), digest_size=16).hexdigest()}",
                     "values": embedding,
                     "metadata": {
                         "url": page_data['url'],
@@ -134,8 +135,8 @@ async def crawl_and_store():
         # Save source tracking data
         source_data = crawler.source_tracker.get_all_sources()
         source_file = f"aven_sources_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(source_file, 'w', encoding='utf-8') as f:
-            json.dump(source_data, f, indent=2, ensure_ascii=False)
+        with open(source_file, 'wb') as f:
+            f.write(orjson.dumps(source_data, option=orjson.OPT_INDENT_2))
         logger.info(f"Source tracking data saved to: {source_file}")
         
         return True
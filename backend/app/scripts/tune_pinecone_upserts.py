@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pinecone upsert tuning script for Aven AI Assistant
+Sweeps upsert batch size and concurrency against a scratch namespace to pick
+PINECONE_UPSERT_BATCH_SIZE / PINECONE_UPSERT_CONCURRENCY
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.services.pinecone_service import PineconeService
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Vectors written per run; the scratch namespace is deleted afterwards
+SAMPLE_SIZE = 2000
+DIMENSION = 1536
+# Metadata text per vector, roughly the size of a knowledge-base chunk
+SAMPLE_TEXT = "Aven home equity credit card sample chunk. " * 50
+NAMESPACE = "upsert-tuning"
+
+BATCH_SIZES = [32, 64, 100]
+CONCURRENCY_LEVELS = [1, 2, 4, 8]
+
+def build_sample_vectors():
+    """Random unit vectors with realistic metadata"""
+    values = np.random.default_rng(0).standard_normal((SAMPLE_SIZE, DIMENSION)).astype(np.float32)
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    return [
+        {"id": f"tune-{i}", "values": row.tolist(), "metadata": {"text": SAMPLE_TEXT, "source": "tuning"}}
+        for i, row in enumerate(values)
+    ]
+
+async def run_sweep():
+    """Time every batch size / concurrency combination and report throughput"""
+    pinecone_service = PineconeService()
+    vectors = build_sample_vectors()
+    results = []
+
+    try:
+        for batch_size in BATCH_SIZES:
+            for concurrency in CONCURRENCY_LEVELS:
+                start = time.perf_counter()
+                await pinecone_service.upsert_vectors(vectors, batch_size=batch_size, concurrency=concurrency, namespace=NAMESPACE)
+                elapsed = time.perf_counter() - start
+                rate = len(vectors) / elapsed
+                results.append((rate, batch_size, concurrency))
+                logger.info(f"batch_size={batch_size:<4} concurrency={concurrency:<2} {elapsed:6.2f}s  {rate:8.0f} vectors/s")
+    finally:
+        await asyncio.to_thread(pinecone_service.index.delete, delete_all=True, namespace=NAMESPACE)
+        logger.info(f"Deleted scratch namespace '{NAMESPACE}'")
+
+    rate, batch_size, concurrency = max(results)
+    logger.info(f"Fastest: PINECONE_UPSERT_BATCH_SIZE={batch_size} PINECONE_UPSERT_CONCURRENCY={concurrency} ({rate:.0f} vectors/s)")
+
+async def main():
+    """Main function"""
+    logger.info("Starting Pinecone upsert tuning sweep...")
+    await run_sweep()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,9 @@
 import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
-from app.services.openai_service import OpenAIService
-from app.services.pinecone_service import PineconeService
-from app.services.cache_service import CacheService
-from app.services.guardrails_service import GuardrailsService
+from app.services.openai_service import get_openai_service
+from app.services.pinecone_service import get_pinecone_service
+from app.services.cache_service import get_cache_service
+from app.services.guardrails_service import get_guardrails_service
 from app.services.intelligent_response_service import IntelligentResponseService
 from app.services.real_time_learning_service import RealTimeLearningService
 from app.services.query_analyzer import QueryAnalyzer
@@ -13,24 +13,62 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Interaction logging runs off the response path in batches
+LOG_QUEUE_MAXSIZE = 10000
+LOG_BATCH_SIZE = 50
+LOG_BATCH_WINDOW_SECONDS = 0.1
+
 class AssistantService:
     """Orchestrates text and voice Q&A for the AI customer care assistant, with calendar and NLP integration."""
     def __init__(self):
-        self.openai_service = OpenAIService()
-        self.pinecone_service = PineconeService()
-        self.cache_service = CacheService()
-        self.guardrails_service = GuardrailsService()
+        self.openai_service = get_openai_service()
+        self.pinecone_service = get_pinecone_service()
+        self.cache_service = get_cache_service()
+        self.guardrails_service = get_guardrails_service()
         self.intelligent_response_service = IntelligentResponseService()
         self.learning_service = RealTimeLearningService()
         self.query_analyzer = QueryAnalyzer()
         self.calendar_service = CalendarService()
         self.session_history: Dict[str, List[Dict[str, Any]]] = {}  # session_id -> list of messages
+        # Background interaction logging (worker starts lazily on the running loop)
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_worker: Optional[asyncio.Task] = None
+
+    def _enqueue_interaction(self, interaction: Dict[str, Any]):
+        """Queue an interaction for the background learning logger without blocking the caller"""
+        if self._log_queue is None:
+            self._log_queue = asyncio.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+        if self._log_worker is None or self._log_worker.done():
+            self._log_worker = asyncio.create_task(self._drain_logs())
+        try:
+            self._log_queue.put_nowait(interaction)
+        except asyncio.QueueFull:
+            logger.warning("Interaction log queue is full, dropping interaction")
+
+    async def _drain_logs(self):
+        """Pull queued interactions in batches and hand them to the learning service"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._log_queue.get()]
+            deadline = loop.time() + LOG_BATCH_WINDOW_SECONDS
+            while len(batch) < LOG_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._log_queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.learning_service.log_interactions_bulk(batch)
+            except Exception as e:
+                logger.error(f"Failed to log interaction batch: {e}")
 
     async def process_message(self, message: str, session_id: Optional[str] = None, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Process a text message and return AI response with enhanced intelligence"""
         try:
             # Step 1: Apply guardrails to user input only
-            guardrails_result = self.guardrails_service.check_text(message)
+            guardrails_result = await self.guardrails_service.check_text(message)
             if guardrails_result["status"] != "safe":
                 logger.warning(f"Guardrails triggered on user input: {guardrails_result}")
                 return {
@@ -50,9 +88,9 @@ class AssistantService:
                 # Fallback to simple response generation
                 response = await self._generate_simple_response(message)
             
-            # Step 3: Log interaction for learning
+            # Step 3: Log interaction for learning (processed in the background)
             if session_id:
-                await self.learning_service.log_interaction({
+                self._enqueue_interaction({
                     "query": message,
                     "response": response.get("answer", ""),
                     "confidence": response.get("confidence", 0.0),
@@ -131,6 +169,20 @@ class AssistantService:
             analysis = self.query_analyzer.analyze_query(question)
             logger.info(f"Query analysis: {analysis}")
 
+            # Step 1b: Cheap input guardrails before any calendar, embedding or LLM call
+            input_check = self.guardrails_service.check_input(question)
+            if input_check["status"] != "safe":
+                logger.warning(f"Guardrails triggered on user input: {input_check}")
+                fallback = "Sorry, I can't answer that question."
+                self.session_history[session_id].append({"role": "assistant", "content": fallback, "guardrails": input_check})
+                return {
+                    "answer": fallback,
+                    "sources": [],
+                    "context": "",
+                    "guardrails": input_check,
+                    "analysis": analysis
+                }
+
             # Step 2: Calendar trigger
             if analysis.get("calendar_trigger"):
                 # Use Google Calendar if requested, else local
@@ -149,7 +201,7 @@ class AssistantService:
 
             # Step 3: Embed question
             embedding = await self.openai_service.generate_embeddings(question)
-            # Step 4: Search Pinecone
+            # Step 4: Search Pinecone (the index is cosine, so its scores and order are final)
             kb_results = await self.pinecone_service.search_similar(embedding, top_k=5)
             
             if not kb_results:
@@ -167,9 +219,9 @@ class AssistantService:
             context = "\n\n".join([r["text"] for r in kb_results if r.get("text")])
             sources = [{"url": r["url"], "score": r["score"]} for r in kb_results]
             # Step 5: Generate answer with OpenAI
-            answer = await self.openai_service.generate_response(question, context)
+            answer = await self.openai_service.generate_response(question, context, message_embedding=embedding)
             # Step 6: Guardrails check
-            guardrails_result = self.guardrails_service.check_text(answer)
+            guardrails_result = await self.guardrails_service.check_text(answer)
             if guardrails_result["status"] != "safe":
                 logger.warning(f"Guardrails triggered: {guardrails_result}")
                 fallback = "Sorry, I can't answer that question."
@@ -209,6 +261,22 @@ class AssistantService:
             # Step 2: Analyze query
             analysis = self.query_analyzer.analyze_query(transcript)
             logger.info(f"Voice query analysis: {analysis}")
+            # Step 2b: Cheap input guardrails before the calendar branch can book anything
+            input_check = self.guardrails_service.check_input(transcript)
+            if input_check["status"] != "safe":
+                logger.warning(f"Guardrails triggered on voice input: {input_check}")
+                fallback = "Sorry, I can't answer that question."
+                audio_response = await self._synthesize_speech(fallback, voice)
+                self.session_history.setdefault(session_id, []).append({"role": "assistant", "content": fallback, "guardrails": input_check})
+                return {
+                    "transcription": transcript,
+                    "answer": fallback,
+                    "audio_response": audio_response,
+                    "sources": [],
+                    "context": "",
+                    "guardrails": input_check,
+                    "analysis": analysis
+                }
             # Step 3: Calendar trigger
             if analysis.get("calendar_trigger"):
                 if "google" in transcript.lower():
@@ -216,10 +284,7 @@ class AssistantService:
                 else:
                     meeting = await self.calendar_service.schedule_meeting(user_id or session_id)
                 answer = f"A meeting has been scheduled for you. Details: {meeting}"
-                audio_chunks = []
-                async for audio_chunk in self.voice_service.synthesize_speech_stream(answer, voice=voice):
-                    audio_chunks.append(audio_chunk)
-                audio_response = b"".join(audio_chunks)
+                audio_response = await self._synthesize_speech(answer, voice)
                 self.session_history[session_id].append({"role": "assistant", "content": answer, "calendar": meeting})
                 return {
                     "transcription": transcript,
@@ -236,16 +301,10 @@ class AssistantService:
             # Step 5: Synthesize spoken answer (only if safe)
             audio_response = b""
             if guardrails_result.get("status") == "safe":
-                audio_chunks = []
-                async for audio_chunk in self.voice_service.synthesize_speech_stream(answer, voice=voice):
-                    audio_chunks.append(audio_chunk)
-                audio_response = b"".join(audio_chunks)
+                audio_response = await self._synthesize_speech(answer, voice)
             else:
                 fallback = "Sorry, I can't answer that question."
-                audio_chunks = []
-                async for audio_chunk in self.voice_service.synthesize_speech_stream(fallback, voice=voice):
-                    audio_chunks.append(audio_chunk)
-                audio_response = b"".join(audio_chunks)
+                audio_response = await self._synthesize_speech(fallback, voice)
             return {
                 "transcription": transcript,
                 "answer": answer,
@@ -259,6 +318,13 @@ class AssistantService:
             logger.error(f"AssistantService voice Q&A error: {e}")
             return {"error": str(e)}
 
+    async def _synthesize_speech(self, text: str, voice: str) -> bytes:
+        """Collect synthesized speech into one contiguous buffer"""
+        buffer = bytearray()
+        async for audio_chunk in self.voice_service.synthesize_speech_stream(text, voice=voice):
+            buffer.extend(audio_chunk)
+        return bytes(buffer)
+
     def get_session_history(self, session_id: str) -> List[Dict[str, Any]]:
         return self.session_history.get(session_id, [])
     
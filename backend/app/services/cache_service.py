@@ -1,14 +1,33 @@
-import json
 import logging
 import os
+import base64
 import hashlib
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
 import asyncio
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Run cleanup after this many writes, or sooner if the estimated size crosses the limit
+CLEANUP_EVERY_WRITES = 256
+# Minimum pause between two background cleanup runs of the same cache type
+CLEANUP_MIN_INTERVAL_SECONDS = 5
+# Encoded entries kept in memory per cache type, so hot keys skip the store entirely; each hit is
+# decoded afresh, so readers never share mutable results and both tiers return the same (quantized) data
+MEMORY_CACHE_SIZE = 4096
+# Result fields holding embedding vectors; stored as float16 in the vector search cache
+VECTOR_FIELDS = ("values", "vector", "embedding")
+# Characters encoded per step when hashing cache keys
+HASH_CHUNK_CHARS = 65536
+
 class CacheService:
     """Comprehensive caching service for AI responses, embeddings, and search results"""
     
@@ -27,6 +46,13 @@ class CacheService:
                         self.search_cache_dir, self.vector_cache_dir]:
             cache_subdir.mkdir(exist_ok=True)
         
+        self._dir_by_type = {
+            "responses": self.response_cache_dir,
+            "embeddings": self.embedding_cache_dir,
+            "search": self.search_cache_dir,
+            "vectors": self.vector_cache_dir
+        }
+        
         # Cache configuration
         self.cache_config = {
             "responses": {
@@ -46,13 +72,45 @@ class CacheService:
                 "max_size_mb": 200  # Max 200MB for vector cache
             }
         }
+        self._ttl_seconds = {
+            cache_type: config["ttl_hours"] * 3600 for cache_type, config in self.cache_config.items()
+        }
+        
+        # One SQLite store per cache type: a lookup is a single primary-key SELECT
+        # and cleanup is a DELETE instead of opening and parsing every entry file
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        for cache_type in self.cache_config:
+            self._connections[cache_type] = self._open_store(self._dir_by_type[cache_type])
+            self._locks[cache_type] = threading.Lock()
+        
+        # Cleanup is amortized across writes instead of running on every insert
+        self._writes_since_cleanup = {cache_type: 0 for cache_type in self.cache_config}
+        # Running entry count and payload size per store, kept in step with every write and delete
+        # and reconciled against the store once at startup
+        self._counts: Dict[str, int] = {}
+        self._size_bytes: Dict[str, int] = {}
+        for cache_type in self.cache_config:
+            self._counts[cache_type], self._size_bytes[cache_type] = self._get_store_totals(cache_type)
+        # One background cleanup worker per cache type, started on the first write that needs it
+        self._cleanup_events: Dict[str, asyncio.Event] = {}
+        self._cleanup_tasks: Dict[str, asyncio.Task] = {}
+        
+        # In-process LRU of encoded entries: key -> (timestamp, blob)
+        self._mem: Dict[str, OrderedDict] = {cache_type: OrderedDict() for cache_type in self.cache_config}
+        self._mem_lock = threading.Lock()
+        # Hits recorded since the last cleanup: key -> (hit count, last access); flushed lazily
+        self._pending_hits: Dict[str, Dict[str, Tuple[int, int]]] = {cache_type: {} for cache_type in self.cache_config}
         
         logger.info(f"Cache service initialized with directory: {self.cache_dir}")
     
     def _generate_cache_key(self, data: str, prefix: str = "") -> str:
         """Generate a cache key from data"""
-        # Create a hash of the data
-        hash_object = hashlib.md5(data.encode('utf-8'))
+        # Non-cryptographic use (lookup key only): BLAKE2b is faster than MD5 on 64-bit CPUs
+        hash_object = hashlib.blake2b(digest_size=16)
+        # Encode long inputs (prompts with retrieved context) piecewise instead of copying them whole
+        for start in range(0, len(data), HASH_CHUNK_CHARS):
+            hash_object.update(data[start:start + HASH_CHUNK_CHARS].encode('utf-8'))
         cache_key = hash_object.hexdigest()
         
         if prefix:
@@ -60,101 +118,266 @@ class CacheService:
         
         return cache_key
     
-    def _get_cache_file_path(self, cache_key: str, cache_type: str) -> Path:
-        """Get the file path for a cache entry"""
-        if cache_type == "response_cache_dir":
-            cache_dir = self.response_cache_dir
-        elif cache_type == "embedding_cache_dir":
-            cache_dir = self.embedding_cache_dir
-        elif cache_type == "search_cache_dir":
-            cache_dir = self.search_cache_dir
-        elif cache_type == "vector_cache_dir":
-            cache_dir = self.vector_cache_dir
-        else:
-            raise ValueError(f"Unknown cache type: {cache_type}")
-        return cache_dir / f"{cache_key}.json"
+    def _open_store(self, cache_dir: Path) -> sqlite3.Connection:
+        """Open (creating if needed) the SQLite store inside a cache directory"""
+        conn = sqlite3.connect(str(cache_dir / "cache.db"), isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(k TEXT PRIMARY KEY, ts INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0, last_access INTEGER NOT NULL, blob BLOB NOT NULL)"
+        )
+        # Covering (ts, size) index: expiry sums and deletes never touch the payload pages,
+        # and eviction reads the least recently used rows straight off the last_access index
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_ts_size ON entries (ts, size)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        return conn
+    
+    def _mem_get(self, cache_type: str, cache_key: str) -> Optional[bytes]:
+        """Get a live encoded entry from the in-process LRU"""
+        with self._mem_lock:
+            entry = self._mem[cache_type].get(cache_key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self._ttl_seconds[cache_type]:
+                del self._mem[cache_type][cache_key]
+                return None
+            self._mem[cache_type].move_to_end(cache_key)
+            return entry[1]
     
-    def _is_cache_valid(self, cache_data: Dict[str, Any], cache_type: str) -> bool:
-        """Check if cache entry is still valid based on TTL"""
-        if "timestamp" not in cache_data:
-            return False
+    def _record_hit(self, cache_type: str, cache_key: str):
+        """Count a cache hit; written back to the store on the next cleanup"""
+        with self._mem_lock:
+            pending = self._pending_hits[cache_type]
+            hits = pending[cache_key][0] if cache_key in pending else 0
+            pending[cache_key] = (hits + 1, int(time.time()))
+    
+    def _mem_put(self, cache_type: str, cache_key: str, blob: bytes, cache_time: Optional[float] = None):
+        """Store an encoded entry in the in-process LRU, evicting the least recently used"""
+        with self._mem_lock:
+            mem = self._mem[cache_type]
+            mem[cache_key] = (cache_time if cache_time is not None else time.time(), blob)
+            mem.move_to_end(cache_key)
+            if len(mem) > MEMORY_CACHE_SIZE:
+                mem.popitem(last=False)
+    
+    def _read_row(self, cache_type: str, cache_key: str) -> Optional[Tuple[int, bytes]]:
+        """Read the (timestamp, blob) row of a live cache entry, or None if it is missing or expired"""
+        with self._locks[cache_type]:
+            row = self._connections[cache_type].execute(
+                "SELECT ts, blob FROM entries WHERE k = ?", (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
         
-        cache_time = datetime.fromisoformat(cache_data["timestamp"])
-        ttl_hours = self.cache_config[cache_type]["ttl_hours"]
-        expiry_time = cache_time + timedelta(hours=ttl_hours)
+        # TTL is checked against the row timestamp, so expired entries are dropped before decoding
+        if time.time() - row[0] > self._ttl_seconds[cache_type]:
+            self._delete_entry(cache_type, cache_key)
+            return None
+        return row
+    
+    @staticmethod
+    def _decode_data(blob: bytes) -> Any:
+        """Decode the cached data from an orjson-encoded entry"""
+        # The blob comes back as one contiguous bytes object; parse it in place
+        return orjson.loads(blob)["data"]
+    
+    @staticmethod
+    def _is_vector_field(key: str, value: Any) -> bool:
+        """Check whether a result field holds an embedding vector"""
+        return (key in VECTOR_FIELDS or key.endswith("_embedding")) and isinstance(value, (list, np.ndarray))
+    
+    def _quantize_vectors(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace embedding vectors in search results with base64-encoded float16 bytes"""
+        quantized = []
+        for result in results:
+            if isinstance(result, dict):
+                result = {
+                    key: {"f16": base64.b64encode(np.asarray(value, dtype=np.float16).tobytes()).decode("ascii")}
+                    if self._is_vector_field(key, value) else value
+                    for key, value in result.items()
+                }
+            quantized.append(result)
+        return quantized
+    
+    @staticmethod
+    def _decode_vector_results(blob: bytes) -> List[Dict[str, Any]]:
+        """Decode cached vector search results, reinflating float16 vectors to float32"""
+        results = orjson.loads(blob)["data"]
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            for key, value in result.items():
+                if isinstance(value, dict) and value.keys() == {"f16"}:
+                    result[key] = np.frombuffer(base64.b64decode(value["f16"]), dtype=np.float16).astype(np.float32).tolist()
+        return results
+    
+    def _load_entry(self, cache_type: str, cache_key: str, decode: Callable[[bytes], Any]) -> Optional[Tuple[int, bytes, Any]]:
+        """Read and decode a live entry from the store (blocking)"""
+        row = self._read_row(cache_type, cache_key)
+        if row is None:
+            return None
+        return row[0], row[1], decode(row[1])
+    
+    async def _get_entry(self, cache_type: str, cache_key: str, decode: Callable[[bytes], Any]) -> Optional[Any]:
+        """Look up a live cached value, checking the in-process LRU before the store"""
+        blob = self._mem_get(cache_type, cache_key)
+        if blob is not None:
+            self._record_hit(cache_type, cache_key)
+            return decode(blob)
         
-        return datetime.utcnow() < expiry_time
+        # Store reads and decoding run in a worker thread so the event loop keeps serving requests
+        loaded = await asyncio.to_thread(self._load_entry, cache_type, cache_key, decode)
+        if loaded is None:
+            return None
+        
+        cache_time, blob, value = loaded
+        self._mem_put(cache_type, cache_key, blob, cache_time)
+        self._record_hit(cache_type, cache_key)
+        return value
+    
+    def _write_entry(self, cache_type: str, cache_key: str, payload: Union[bytes, Dict[str, Any]]) -> Tuple[bool, bytes]:
+        """Store a cache entry (raw bytes or a dict to encode); returns whether cleanup is due and the stored blob"""
+        # orjson serializes float-heavy payloads far faster than stdlib json
+        blob = payload if isinstance(payload, bytes) else orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        
+        conn = self._connections[cache_type]
+        with self._locks[cache_type]:
+            previous = conn.execute("SELECT size FROM entries WHERE k = ?", (cache_key,)).fetchone()
+            now = int(time.time())
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (k, ts, size, last_access, blob) VALUES (?, ?, ?, ?, ?)",
+                (cache_key, now, len(blob), now, blob)
+            )
+            self._writes_since_cleanup[cache_type] += 1
+            self._size_bytes[cache_type] += len(blob) - (previous[0] if previous else 0)
+            if previous is None:
+                self._counts[cache_type] += 1
+        
+        max_size_bytes = self.cache_config[cache_type]["max_size_mb"] * 1024 * 1024
+        cleanup_due = (self._writes_since_cleanup[cache_type] >= CLEANUP_EVERY_WRITES
+                       or self._size_bytes[cache_type] > max_size_bytes)
+        return cleanup_due, blob
+    
+    async def _store_entry(self, cache_type: str, cache_key: str, payload: Union[bytes, Dict[str, Any]]):
+        """Write an entry off the event loop, mirror it into the in-process LRU and wake cleanup when due"""
+        cleanup_due, blob = await asyncio.to_thread(self._write_entry, cache_type, cache_key, payload)
+        self._mem_put(cache_type, cache_key, blob)
+        if cleanup_due:
+            self._request_cleanup(cache_type)
     
-    def _get_cache_size_mb(self, cache_dir: Path) -> float:
-        """Get the size of cache directory in MB"""
-        total_size = 0
-        for file_path in cache_dir.rglob("*.json"):
-            total_size += file_path.stat().st_size
-        return total_size / (1024 * 1024)  # Convert to MB
+    def _request_cleanup(self, cache_type: str):
+        """Wake the cache type's background cleanup worker, starting it on first use"""
+        task = self._cleanup_tasks.get(cache_type)
+        if task is None or task.done():
+            # Created lazily: the service is often constructed before an event loop is running
+            self._cleanup_events[cache_type] = asyncio.Event()
+            self._cleanup_tasks[cache_type] = asyncio.create_task(self._cleanup_worker(cache_type))
+        self._cleanup_events[cache_type].set()
+    
+    async def _cleanup_worker(self, cache_type: str):
+        """Run cleanup for one cache type whenever writes signal it, at most once per interval"""
+        event = self._cleanup_events[cache_type]
+        while True:
+            await event.wait()
+            event.clear()
+            try:
+                await asyncio.to_thread(self._cleanup_cache, cache_type)
+            except Exception as e:
+                logger.warning(f"Error cleaning up {cache_type} cache: {e}")
+            await asyncio.sleep(CLEANUP_MIN_INTERVAL_SECONDS)
+    
+    def _delete_entry(self, cache_type: str, cache_key: str):
+        """Delete a single cache entry"""
+        conn = self._connections[cache_type]
+        with self._locks[cache_type]:
+            row = conn.execute("SELECT size FROM entries WHERE k = ?", (cache_key,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE k = ?", (cache_key,))
+                self._size_bytes[cache_type] -= row[0]
+                self._counts[cache_type] -= 1
+    
+    def _get_store_totals(self, cache_type: str) -> Tuple[int, int]:
+        """Count the entries and sum their payload sizes (used to seed the running totals)"""
+        with self._locks[cache_type]:
+            return self._connections[cache_type].execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
     
     def _cleanup_cache(self, cache_type: str):
         """Clean up expired cache entries and enforce size limits"""
-        if cache_type == "responses":
-            cache_dir = self.response_cache_dir
-        elif cache_type == "embeddings":
-            cache_dir = self.embedding_cache_dir
-        elif cache_type == "search":
-            cache_dir = self.search_cache_dir
-        elif cache_type == "vectors":
-            cache_dir = self.vector_cache_dir
-        else:
+        if cache_type not in self._connections:
             raise ValueError(f"Unknown cache type: {cache_type}")
-            
-        max_size_mb = self.cache_config[cache_type]["max_size_mb"]
-        ttl_hours = self.cache_config[cache_type]["ttl_hours"]
         
-        current_time = datetime.utcnow()
-        expired_files = []
-        file_times = []
+        conn = self._connections[cache_type]
+        max_size_bytes = self.cache_config[cache_type]["max_size_mb"] * 1024 * 1024
+        cutoff = int(time.time()) - self._ttl_seconds[cache_type]
         
-        # Find expired files and collect file times
-        for file_path in cache_dir.glob("*.json"):
+        with self._mem_lock:
+            pending_hits = self._pending_hits[cache_type]
+            self._pending_hits[cache_type] = {}
+        
+        # Expiry and eviction run as one transaction: a single WAL commit for the whole batch
+        with self._locks[cache_type]:
+            conn.execute("BEGIN IMMEDIATE")
             try:
-                with open(file_path, 'r') as f:
-                    cache_data = json.load(f)
+                # Write back hit counts gathered since the last cleanup
+                if pending_hits:
+                    conn.executemany(
+                        "UPDATE entries SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE k = ?",
+                        [(hits, last_access, key) for key, (hits, last_access) in pending_hits.items()]
+                    )
+                
+                # Remove expired entries
+                expired, expired_bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE ts < ?", (cutoff,)
+                ).fetchone()
+                if expired:
+                    conn.execute("DELETE FROM entries WHERE ts < ?", (cutoff,))
+                current_size = self._size_bytes[cache_type] - expired_bytes
+                current_count = self._counts[cache_type] - expired
                 
-                if "timestamp" in cache_data:
-                    cache_time = datetime.fromisoformat(cache_data["timestamp"])
-                    expiry_time = cache_time + timedelta(hours=ttl_hours)
+                # Evict until under the size limit, v-LRU style: take the least recently used
+                # tenth (at least the estimated victim count) and drop its least-hit entries first
+                evicted = 0
+                while current_size > max_size_bytes:
+                    if current_count <= 0:
+                        break
+                    average_size = current_size / current_count
+                    victim_count = math.ceil((current_size - max_size_bytes) / max(average_size, 1)) + 1
+                    bucket_size = max(victim_count, current_count // 10)
                     
-                    if current_time > expiry_time:
-                        expired_files.append(file_path)
-                    else:
-                        file_times.append((file_path, cache_time))
-            except Exception as e:
-                logger.warning(f"Error reading cache file {file_path}: {e}")
-                expired_files.append(file_path)
-        
-        # Remove expired files
-        for file_path in expired_files:
-            try:
-                file_path.unlink()
-                logger.debug(f"Removed expired cache file: {file_path}")
-            except Exception as e:
-                logger.warning(f"Error removing expired cache file {file_path}: {e}")
-        
-        # Check size limit and remove oldest files if needed
-        current_size_mb = self._get_cache_size_mb(cache_dir)
-        if current_size_mb > max_size_mb:
-            # Sort files by timestamp (oldest first)
-            file_times.sort(key=lambda x: x[1])
-            
-            # Remove oldest files until under size limit
-            for file_path, _ in file_times:
-                try:
-                    file_path.unlink()
-                    logger.debug(f"Removed old cache file due to size limit: {file_path}")
+                    # ORDER BY ... LIMIT keeps a bucket-sized heap instead of sorting every row
+                    bucket = conn.execute(
+                        "SELECT k, size, hits, last_access FROM entries ORDER BY last_access LIMIT ?", (bucket_size,)
+                    ).fetchall()
+                    bucket.sort(key=lambda row: (row[2], row[3]))
                     
-                    current_size_mb = self._get_cache_size_mb(cache_dir)
-                    if current_size_mb <= max_size_mb:
+                    victims = []
+                    for key, size, _, _ in bucket:
+                        if current_size <= max_size_bytes:
+                            break
+                        victims.append((key,))
+                        current_size -= size
+                    if not victims:
                         break
-                except Exception as e:
-                    logger.warning(f"Error removing cache file {file_path}: {e}")
+                    conn.executemany("DELETE FROM entries WHERE k = ?", victims)
+                    evicted += len(victims)
+                    current_count -= len(victims)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            self._size_bytes[cache_type] = current_size
+            self._counts[cache_type] = current_count
+            self._writes_since_cleanup[cache_type] = 0
+        
+        if expired:
+            logger.debug(f"Removed {expired} expired {cache_type} cache entries")
+        if evicted:
+            logger.debug(f"Removed {evicted} old {cache_type} cache entries due to size limit")
     
     async def get_cached_response(self, query: str, context: str = "") -> Optional[Dict[str, Any]]:
         """Get cached AI response for a query"""
@@ -162,21 +385,14 @@ class CacheService:
             # Generate cache key from query and context
             cache_data = f"query:{query}|context:{context}"
             cache_key = self._generate_cache_key(cache_data, "response")
-            cache_file = self._get_cache_file_path(cache_key, "response_cache_dir")
-            
-            if not cache_file.exists():
-                return None
-            
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
             
-            if not self._is_cache_valid(cached_data, "responses"):
-                cache_file.unlink()  # Remove expired cache
+            cached_data = await self._get_entry("responses", cache_key, self._decode_data)
+            if cached_data is None:
                 return None
             
             logger.debug(f"Cache hit for response: {query[:50]}...")
-            return cached_data["data"]
-            
+            return cached_data
+        
         except Exception as e:
             logger.warning(f"Error reading response cache: {e}")
             return None
@@ -184,17 +400,13 @@ class CacheService:
     async def cache_response(self, query: str, response: Dict[str, Any], context: str = ""):
         """Cache AI response"""
         try:
-            # Cleanup before adding new cache
-            self._cleanup_cache("responses")
-            
             # Generate cache key
             cache_key_data = f"query:{query}|context:{context}"
             cache_key = self._generate_cache_key(cache_key_data, "response")
-            cache_file = self._get_cache_file_path(cache_key, "response_cache_dir")
             
             # Prepare cache data
             cache_data = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": int(time.time()),
                 "query": query,
                 "context": context,
                 "data": response,
@@ -202,11 +414,10 @@ class CacheService:
             }
             
             # Write to cache
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            await self._store_entry("responses", cache_key, cache_data)
             
             logger.debug(f"Cached response for: {query[:50]}...")
-            
+        
         except Exception as e:
             logger.warning(f"Error caching response: {e}")
     
@@ -214,21 +425,17 @@ class CacheService:
         """Get cached embedding for text"""
         try:
             cache_key = self._generate_cache_key(text, "embedding")
-            cache_file = self._get_cache_file_path(cache_key, "embedding_cache_dir")
-            
-            if not cache_file.exists():
-                return None
             
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-            
-            if not self._is_cache_valid(cached_data, "embeddings"):
-                cache_file.unlink()
+            # Held in memory as raw float32 bytes (~4x smaller than a list of Python floats)
+            embedding = await self._get_entry(
+                "embeddings", cache_key, lambda blob: np.frombuffer(blob, dtype=np.float32)
+            )
+            if embedding is None:
                 return None
             
             logger.debug(f"Cache hit for embedding: {text[:50]}...")
-            return cached_data["data"]
-            
+            return embedding.tolist()
+        
         except Exception as e:
             logger.warning(f"Error reading embedding cache: {e}")
             return None
@@ -236,23 +443,14 @@ class CacheService:
     async def cache_embedding(self, text: str, embedding: List[float]):
         """Cache text embedding"""
         try:
-            self._cleanup_cache("embeddings")
-            
             cache_key = self._generate_cache_key(text, "embedding")
-            cache_file = self._get_cache_file_path(cache_key, "embedding_cache_dir")
-            
-            cache_data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "text": text,
-                "data": embedding,
-                "cache_type": "embedding"
-            }
             
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            # Raw float32 bytes: ~4x smaller than a JSON array and no parsing on read
+            vector = np.asarray(embedding, dtype=np.float32)
+            await self._store_entry("embeddings", cache_key, vector.tobytes())
             
             logger.debug(f"Cached embedding for: {text[:50]}...")
-            
+        
         except Exception as e:
             logger.warning(f"Error caching embedding: {e}")
     
@@ -261,21 +459,14 @@ class CacheService:
         try:
             cache_key_data = f"query:{query}|type:{search_type}"
             cache_key = self._generate_cache_key(cache_key_data, "search")
-            cache_file = self._get_cache_file_path(cache_key, "search_cache_dir")
             
-            if not cache_file.exists():
-                return None
-            
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-            
-            if not self._is_cache_valid(cached_data, "search"):
-                cache_file.unlink()
+            cached_data = await self._get_entry("search", cache_key, self._decode_data)
+            if cached_data is None:
                 return None
             
             logger.debug(f"Cache hit for search: {query[:50]}...")
-            return cached_data["data"]
-            
+            return cached_data
+        
         except Exception as e:
             logger.warning(f"Error reading search cache: {e}")
             return None
@@ -283,25 +474,21 @@ class CacheService:
     async def cache_search(self, query: str, results: List[Dict[str, Any]], search_type: str = "general"):
         """Cache search results"""
         try:
-            self._cleanup_cache("search")
-            
             cache_key_data = f"query:{query}|type:{search_type}"
             cache_key = self._generate_cache_key(cache_key_data, "search")
-            cache_file = self._get_cache_file_path(cache_key, "search_cache_dir")
             
             cache_data = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": int(time.time()),
                 "query": query,
                 "search_type": search_type,
                 "data": results,
                 "cache_type": "search"
             }
             
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            await self._store_entry("search", cache_key, cache_data)
             
             logger.debug(f"Cached search results for: {query[:50]}...")
-            
+        
         except Exception as e:
             logger.warning(f"Error caching search results: {e}")
     
@@ -310,21 +497,14 @@ class CacheService:
         try:
             cache_data = f"query:{query}|top_k:{top_k}"
             cache_key = self._generate_cache_key(cache_data, "vector")
-            cache_file = self._get_cache_file_path(cache_key, "vector_cache_dir")
-            
-            if not cache_file.exists():
-                return None
-            
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
             
-            if not self._is_cache_valid(cached_data, "vectors"):
-                cache_file.unlink()
+            cached_data = await self._get_entry("vectors", cache_key, self._decode_vector_results)
+            if cached_data is None:
                 return None
             
             logger.debug(f"Cache hit for vector search: {query[:50]}...")
-            return cached_data["data"]
-            
+            return cached_data
+        
         except Exception as e:
             logger.warning(f"Error reading vector search cache: {e}")
             return None
@@ -332,25 +512,22 @@ class CacheService:
     async def cache_vector_search(self, query: str, results: List[Dict[str, Any]], top_k: int = 5):
         """Cache vector search results"""
         try:
-            self._cleanup_cache("vectors")
-            
             cache_key_data = f"query:{query}|top_k:{top_k}"
             cache_key = self._generate_cache_key(cache_key_data, "vector")
-            cache_file = self._get_cache_file_path(cache_key, "vector_cache_dir")
             
             cache_data = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": int(time.time()),
                 "query": query,
                 "top_k": top_k,
-                "data": results,
+                # float16 halves the footprint of the embedding vectors carried in results
+                "data": self._quantize_vectors(results),
                 "cache_type": "vector_search"
             }
             
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2)
+            await self._store_entry("vectors", cache_key, cache_data)
             
             logger.debug(f"Cached vector search results for: {query[:50]}...")
-            
+        
         except Exception as e:
             logger.warning(f"Error caching vector search results: {e}")
     
@@ -358,28 +535,30 @@ class CacheService:
         """Clear cache entries"""
         try:
             if cache_type:
-                if cache_type == "responses":
-                    cache_dir = self.response_cache_dir
-                elif cache_type == "embeddings":
-                    cache_dir = self.embedding_cache_dir
-                elif cache_type == "search":
-                    cache_dir = self.search_cache_dir
-                elif cache_type == "vectors":
-                    cache_dir = self.vector_cache_dir
-                else:
+                if cache_type not in self._connections:
                     raise ValueError(f"Unknown cache type: {cache_type}")
-                    
-                for file_path in cache_dir.glob("*.json"):
-                    file_path.unlink()
+                
+                with self._locks[cache_type]:
+                    self._connections[cache_type].execute("DELETE FROM entries")
+                    self._size_bytes[cache_type] = 0
+                    self._counts[cache_type] = 0
+                with self._mem_lock:
+                    self._mem[cache_type].clear()
+                
                 logger.info(f"Cleared {cache_type} cache")
             else:
                 # Clear all caches
-                for cache_dir in [self.response_cache_dir, self.embedding_cache_dir, 
-                                self.search_cache_dir, self.vector_cache_dir]:
-                    for file_path in cache_dir.glob("*.json"):
-                        file_path.unlink()
-                logger.info("Cleared all caches")
+                for store_type, conn in self._connections.items():
+                    with self._locks[store_type]:
+                        conn.execute("DELETE FROM entries")
+                        self._size_bytes[store_type] = 0
+                        self._counts[store_type] = 0
+                with self._mem_lock:
+                    for mem in self._mem.values():
+                        mem.clear()
                 
+                logger.info("Cleared all caches")
+        
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
     
@@ -389,22 +568,9 @@ class CacheService:
             stats = {}
             
             for cache_type in self.cache_config.keys():
-                if cache_type == "responses":
-                    cache_dir = self.response_cache_dir
-                elif cache_type == "embeddings":
-                    cache_dir = self.embedding_cache_dir
-                elif cache_type == "search":
-                    cache_dir = self.search_cache_dir
-                elif cache_type == "vectors":
-                    cache_dir = self.vector_cache_dir
-                else:
-                    continue
-                
-                # Count files
-                file_count = len(list(cache_dir.glob("*.json")))
-                
-                # Calculate size
-                size_mb = self._get_cache_size_mb(cache_dir)
+                # Count and size come from the running totals rather than a scan
+                file_count = self._counts[cache_type]
+                size_mb = self._size_bytes[cache_type] / (1024 * 1024)
                 
                 # Get max size
                 max_size_mb = self.cache_config[cache_type]["max_size_mb"]
@@ -417,7 +583,7 @@ class CacheService:
                 }
             
             return stats
-            
+        
         except Exception as e:
             logger.error(f"Error getting cache statistics: {e}")
             return {}
@@ -428,4 +594,13 @@ class CacheService:
         
         # This would be called during startup to pre-cache common queries
         # Implementation depends on the specific queries you want to cache
-        pass 
\ No newline at end of file
+        pass
+
+_cache_service: Optional[CacheService] = None
+
+def get_cache_service() -> CacheService:
+    """Process-wide CacheService, so its stores and in-memory LRU are shared by every caller"""
+    global _cache_service
+    if _cache_service is None:
+        _cache_service = CacheService()
+    return _cache_service
@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+class CrawlCache:
+    """On-disk cache of crawled page bodies (with their validators) and Firecrawl results"""
+
+    def __init__(self, cache_dir: str = "cache/crawl"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Crawl phases run concurrently; every call happens in a worker thread, so serialize access
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / "cache.db"),
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "fetched_at INTEGER NOT NULL, body BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS firecrawl ("
+            "k TEXT PRIMARY KEY, fetched_at INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+
+    def get_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached body, validators and fetch time for a URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fetched_at, body FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, fetched_at, body = row
+        return {"etag": etag, "last_modified": last_modified, "fetched_at": fetched_at, "body": body}
+
+    def put_page(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        """Store a freshly fetched page body along with its ETag/Last-Modified validators"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, fetched_at, body) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, int(time.time()), body)
+            )
+
+    def touch_page(self, url: str):
+        """Mark a cached page as revalidated (the server answered 304 Not Modified)"""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (int(time.time()), url))
+
+    def get_firecrawl(self, url: str, max_age_seconds: int) -> Optional[Dict[str, Any]]:
+        """Return the cached Firecrawl result for a URL if it is younger than max_age_seconds"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, data FROM firecrawl WHERE k = ?", (self._key(url),)
+            ).fetchone()
+        if row is None or time.time() - row[0] >= max_age_seconds:
+            return None
+        return orjson.loads(row[1])
+
+    def put_firecrawl(self, url: str, data: Dict[str, Any]):
+        """Store a Firecrawl result for a URL"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO firecrawl (k, fetched_at, data) VALUES (?, ?, ?)",
+                (self._key(url), int(time.time()), orjson.dumps(data))
+            )
+
+    def close(self):
+        """Close the underlying SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
@@ -1,34 +1,300 @@
 import asyncio
-import json
+import concurrent.futures
+import hashlib
+import io
 import logging
 import os
+import random
 import re
+import tempfile
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import aiohttp
+import orjson
 from bs4 import BeautifulSoup
-from app.services.openai_service import OpenAIService
-from app.services.pinecone_service import PineconeService
+from app.core.rate_limiter import HostRateLimiter
+from app.services.crawl_cache import CrawlCache
+from app.services.openai_service import get_openai_service
+from app.services.pinecone_service import get_pinecone_service
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HTML_PARSER = "lxml"
+except ImportError:
+    logger.info("lxml not installed; falling back to Python's html.parser for HTML parsing.")
+    from xml.etree import ElementTree as etree
+    lxml_html = None
+    HTML_PARSER = "html.parser"
+
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    logger.info("selectolax not installed; rendered page text will be extracted with BeautifulSoup.")
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    logger.info("pypdfium2 not installed; legal PDFs will be stored as placeholders.")
+    PDFIUM_AVAILABLE = False
+
+# Maximum number of pages fetched/scraped at the same time across all crawl phases
+CRAWL_CONCURRENCY = 20
+# Maximum number of HTTP requests in flight at once, across all hosts
+FETCH_CONCURRENCY = 50
+
+# Attempts per page for connection errors, timeouts, 429 and 5xx responses; other 4xx fail immediately
+FETCH_MAX_ATTEMPTS = 3
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Requests per second allowed per host (subdomains included); other hosts use DEFAULT_HOST_RATE
+HOST_RATE_LIMITS = {
+    "aven.com": 10,
+    "trustpilot.com": 2,
+    "g2.com": 1,
+}
+DEFAULT_HOST_RATE = 5
+
+# Crawled pages and Firecrawl results are reused for this long before being revalidated/re-scraped
+CRAWL_CACHE_DIR = os.getenv("CRAWL_CACHE_DIR", "cache/crawl")
+CRAWL_CACHE_TTL_SECONDS = 24 * 3600
+
+# Knowledge items embedded per OpenAI request, and vectors sent per Pinecone upsert request
+EMBEDDING_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 100
+
+# Embedded batches allowed to wait for upsert before embedding pauses
+EMBED_UPSERT_QUEUE_SIZE = 2
+
+# PDFs larger than this spill from memory to a temporary file while downloading
+PDF_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+# Browser-like headers sent with every crawl request
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Content signal patterns, each group merged into one alternation so the text is scanned once
+_CONTACT_RE = re.compile(
+    r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'  # Phone numbers
+    r'|\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'  # Email
+    r'|\b(?:contact|support|help|call|email)\b',
+    re.IGNORECASE
+)
+_PRICING_RE = re.compile(
+    r'\$\d+'  # Dollar amounts
+    r'|\b(?:annual|monthly|yearly|fee|cost|price|rate)\b'
+    r'|\b(?:APR|interest|percentage)\b',
+    re.IGNORECASE
+)
+_FEATURE_RE = re.compile(
+    r'\b(?:feature|benefit|advantage|perk|reward|cashback)\b'
+    r'|\b(?:limit|credit|approval|application)\b',
+    re.IGNORECASE
+)
+
+# Navigation and unrelated fragments scraped along with review text
+_UNWANTED_REVIEW_RES = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in [
+    r'Suggested companies.*?Categories',
+    r'Log in.*?For bus',
+    r'We verify reviewers.*?We advocate',
+    r'Here are \d+ tips.*?writing great reviews',
+    r'Figure.*?reviews',
+    r'Advance America.*?reviews',
+    r'Upstart.*?reviews',
+    r'Categories.*?Blog',
+    r'For bus.*?feedback',
+    r'Verification can help.*?bias',
+    r'Offering incentives.*?',
+    r'Read Customer Service Reviews.*?',
+    r'Customer Service Reviews.*?',
+]]
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# URL keywords per content type, checked in priority order (first matching type wins)
+_CONTENT_TYPE_RES = [(content_type, re.compile('|'.join(keywords), re.IGNORECASE)) for content_type, keywords in [
+    ("faq", ['faq', 'help', 'support']),
+    ("legal", ['legal', 'privacy', 'terms']),
+    ("product", ['product', 'card', 'heloc']),
+    ("company", ['about', 'company']),
+    ("educational", ['blog', 'education', 'resources']),
+]]
+# Page chrome dropped before extracting text from a rendered page
+_BOILERPLATE_TAGS = ['script', 'style', 'nav', 'footer', 'header', 'aside']
+_RATING_RE = re.compile(r'(\d+\.?\d*)\s*(?:out of|/)\s*5')
+# Digits with optional thousands separators, e.g. "1,234 reviews"
+_REVIEW_COUNT_RE = re.compile(r'\d[\d,]*')
+# Words whose first occurrence marks a review-related snippet when no review cards were found
+_REVIEW_INDICATORS = ['review', 'rating', 'customer', 'feedback']
+_REVIEW_INDICATOR_RE = re.compile('|'.join(_REVIEW_INDICATORS), re.IGNORECASE)
+
+# Review page queries, each a single union so the document is walked once per query
+_RATING_CSS = ('div[data-service-review-card-hermes-typography="true"], '
+               'span[data-service-review-card-hermes-typography="true"], '
+               '.star-rating, .rating, [data-rating]')
+_REVIEW_COUNT_CSS = 'span:-soup-contains("review"), .review-count, [data-review-count]'
+_REVIEW_CSS = ('article[data-service-review-card-hermes-typography="true"], '
+               '.review-card, .review-content, [data-review], .review-item, .customer-review')
+
+if lxml_html is not None:
+    def _has_class(name: str) -> str:
+        return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+    
+    _RATING_XPATH = etree.XPath(
+        '//div[@data-service-review-card-hermes-typography="true"]'
+        ' | //span[@data-service-review-card-hermes-typography="true"]'
+        f' | //*[{_has_class("star-rating")} or {_has_class("rating")} or @data-rating]'
+    )
+    _REVIEW_COUNT_XPATH = etree.XPath(
+        '//span[contains(., "review")]'
+        f' | //*[{_has_class("review-count")} or @data-review-count]'
+    )
+    _REVIEW_XPATH = etree.XPath(
+        '//article[@data-service-review-card-hermes-typography="true"]'
+        f' | //*[{_has_class("review-card")} or {_has_class("review-content")} or @data-review'
+        f' or {_has_class("review-item")} or {_has_class("customer-review")}]'
+    )
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retrying a fetch, honouring Retry-After when the server sends seconds"""
+    if retry_after:
+        try:
+            return min(30.0, float(retry_after))
+        except ValueError:
+            pass
+    # Exponential backoff with jitter: 1s, 2s, 4s ... capped at 10s
+    return min(10.0, 2 ** attempt) + random.uniform(0, 1)
+
+def _parse_html(markup: Union[str, bytes]) -> BeautifulSoup:
+    """Parse HTML with the fastest available parser (raw bytes let bs4 detect the encoding itself)"""
+    return BeautifulSoup(markup, HTML_PARSER)
+
+def _query_review_page(markup: bytes) -> Tuple[List[str], List[str], List[str], str]:
+    """Return (rating texts, review count texts, review texts, page text) for a review page"""
+    if lxml_html is not None:
+        tree = lxml_html.fromstring(markup)
+        def texts(xpath):
+            return [element.text_content().strip() for element in xpath(tree)]
+        return texts(_RATING_XPATH), texts(_REVIEW_COUNT_XPATH), texts(_REVIEW_XPATH), tree.text_content()
+    
+    soup = _parse_html(markup)
+    def texts(selector):
+        return [element.get_text().strip() for element in soup.select(selector)]
+    return texts(_RATING_CSS), texts(_REVIEW_COUNT_CSS), texts(_REVIEW_CSS), soup.get_text()
+
+def _document_key(item: Dict[str, Any]) -> str:
+    """Stable 128-bit key for a knowledge item (built-in hash() of a str changes with every process)"""
+    return hashlib.blake2b((item['url'] + item['title']).encode('utf-8'), digest_size=16).hexdigest()
+
+def _canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of one page dedupe to the same string"""
+    parsed = urlparse(url.strip())
+    # Drop tracking parameters; keep everything else in its original order
+    query = urlencode([(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                       if not key.lower().startswith('utm_')])
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), path, parsed.params, query, ''))
+
+def _dedupe_urls(urls) -> List[str]:
+    """Canonicalize URLs and drop duplicates, keeping first-seen order"""
+    return list(dict.fromkeys(_canonicalize_url(url) for url in urls))
+
+def _pdf_to_text(source) -> str:
+    """Extract the text of every page of a PDF with pdfium"""
+    pdf = pdfium.PdfDocument(source)
+    try:
+        pages_text = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            pages_text.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return '\n'.join(pages_text)
+    finally:
+        pdf.close()
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+# How many levels of nested sitemap indexes to follow
+MAX_SITEMAP_DEPTH = 2
+
+def _parse_sitemap(source: io.BytesIO) -> Tuple[List[str], List[str]]:
+    """Stream-parse a sitemap, returning (page URLs, nested sitemap URLs)"""
+    page_urls = []
+    child_sitemaps = []
+    for _, elem in etree.iterparse(source, events=("end",)):
+        if elem.tag == f"{SITEMAP_NS}url":
+            loc = elem.findtext(f"{SITEMAP_NS}loc")
+            if loc:
+                page_urls.append(loc.strip())
+            elem.clear()
+        elif elem.tag == f"{SITEMAP_NS}sitemap":
+            loc = elem.findtext(f"{SITEMAP_NS}loc")
+            if loc:
+                child_sitemaps.append(loc.strip())
+            elem.clear()
+    return page_urls, child_sitemaps
+
 class EnhancedKnowledgeService:
     """Enhanced knowledge base service with multiple data sources and intelligent processing"""
     
     def __init__(self):
-        self.openai_service = OpenAIService()
-        self.pinecone_service = PineconeService()
+        self.openai_service = get_openai_service()
+        self.pinecone_service = get_pinecone_service()
         self.session = None
+        self._crawl_semaphore = None
+        self._fetch_semaphore = None
+        self._host_limiter = None
+        self._crawl_cache = None
+        self._firecrawl = None
+        self._pool = None
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # One pooled session for the whole crawl: keep-alive TLS connections and cached DNS per host
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            # Unreachable hosts fail within 5s and stalled reads within 20s instead of a flat 30s
+            timeout=aiohttp.ClientTimeout(total=60, connect=5, sock_read=20),
+            headers=DEFAULT_HEADERS
+        )
+        self._crawl_semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+        self._fetch_semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        self._host_limiter = HostRateLimiter(HOST_RATE_LIMITS, DEFAULT_HOST_RATE)
+        self._crawl_cache = CrawlCache(CRAWL_CACHE_DIR)
+        # Parsing is CPU-bound; worker processes keep it off the event loop and spread it across cores
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self._crawl_cache:
+            self._crawl_cache.close()
+            self._crawl_cache = None
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
     
     async def build_comprehensive_knowledge_base(self):
         """Build a comprehensive knowledge base from multiple sources"""
@@ -36,35 +302,27 @@ class EnhancedKnowledgeService:
         knowledge_data = []
         timestamp = datetime.now(timezone.utc).isoformat()
         
-        # 1. Enhanced Aven Site Crawling
+        # 1-6. Run all collection phases concurrently; their page fetches share the crawl semaphore
         logger.info("🔄 Crawling Aven website comprehensively...")
-        aven_data = await self._crawl_aven_site_enhanced()
-        knowledge_data.extend(aven_data)
-        
-        # 2. FAQ and Support Documentation
         logger.info("📋 Gathering FAQ and support documentation...")
-        faq_data = await self._gather_faq_documentation()
-        knowledge_data.extend(faq_data)
-        
-        # 3. Legal and Compliance Documents
         logger.info("⚖️ Processing legal and compliance documents...")
-        legal_data = await self._process_legal_documents()
-        knowledge_data.extend(legal_data)
-        
-        # 4. Customer Reviews and Feedback
         logger.info("⭐ Collecting customer reviews and feedback...")
-        review_data = await self._collect_customer_reviews()
-        knowledge_data.extend(review_data)
-        
-        # 5. Industry and Market Information
         logger.info("📊 Gathering industry and market information...")
-        industry_data = await self._gather_industry_info()
-        knowledge_data.extend(industry_data)
-        
-        # 6. Product Specifications and Features
         logger.info("💳 Processing product specifications...")
-        product_data = await self._process_product_specs()
-        knowledge_data.extend(product_data)
+        phase_results = await asyncio.gather(
+            self._crawl_aven_site_enhanced(),      # 1. Enhanced Aven Site Crawling
+            self._gather_faq_documentation(),      # 2. FAQ and Support Documentation
+            self._process_legal_documents(),       # 3. Legal and Compliance Documents
+            self._collect_customer_reviews(),      # 4. Customer Reviews and Feedback
+            self._gather_industry_info(),          # 5. Industry and Market Information
+            self._process_product_specs(),         # 6. Product Specifications and Features
+            return_exceptions=True
+        )
+        for phase_data in phase_results:
+            if isinstance(phase_data, Exception):
+                logger.error(f"❌ Knowledge collection phase failed: {phase_data}")
+                continue
+            knowledge_data.extend(phase_data)
         
         # 7. Save scraped data to files
         logger.info("💾 Saving scraped data to files...")
@@ -81,39 +339,104 @@ class EnhancedKnowledgeService:
             "files_saved": True
         }
     
-    async def _fetch_sitemap_urls(self) -> List[str]:
-        """Fetch URLs from the actual Aven sitemap"""
+    async def _fetch_sitemap_urls(self, sitemap_url: str = "https://aven.com/sitemap.xml", depth: int = 0) -> List[str]:
+        """Fetch URLs from the actual Aven sitemap, expanding nested sitemap indexes"""
         try:
-            sitemap_url = "https://aven.com/sitemap.xml"
-            async with self.session.get(sitemap_url, timeout=30) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    
-                    # Parse XML sitemap using string methods (more compatible)
-                    urls = []
-                    
-                    # Simple XML parsing for <loc> tags
-                    lines = content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if '<loc>' in line and '</loc>' in line:
-                            # Extract URL between <loc> and </loc>
-                            start = line.find('<loc>') + 5
-                            end = line.find('</loc>')
-                            if start > 4 and end > start:
-                                url = line[start:end].strip()
-                                if url and url.startswith('https://aven.com/'):
-                                    urls.append(url)
-                    
-                    logger.info(f"📋 Fetched {len(urls)} URLs from sitemap")
-                    return urls
-                else:
-                    logger.warning(f"⚠️ Failed to fetch sitemap: HTTP {response.status}")
-                    return []
+            # Goes through the retrying, cached page fetch like every other crawl request
+            body = await self._fetch_html(sitemap_url)
+            if body is None:
+                logger.warning(f"⚠️ Failed to fetch sitemap {sitemap_url}")
+                return []
+            
+            # Parse <url>/<sitemap> entries with a streaming XML parser
+            page_urls, child_sitemaps = _parse_sitemap(io.BytesIO(body))
+            urls = [url for url in map(_canonicalize_url, page_urls) if url.startswith('https://aven.com/')]
+            
+            # A sitemap index lists further sitemaps; fetch them in parallel
+            if child_sitemaps and depth < MAX_SITEMAP_DEPTH:
+                nested = await asyncio.gather(
+                    *(self._fetch_sitemap_urls(child, depth + 1) for child in child_sitemaps)
+                )
+                for child_urls in nested:
+                    urls.extend(child_urls)
+            
+            logger.info(f"📋 Fetched {len(urls)} URLs from sitemap {sitemap_url}")
+            return urls
                     
         except Exception as e:
-            logger.error(f"❌ Error fetching sitemap: {e}")
+            logger.error(f"❌ Error fetching sitemap {sitemap_url}: {e}")
             return []
+    
+    @asynccontextmanager
+    async def _fetch(self, url: str, **kwargs):
+        """GET a URL through the shared session, respecting per-host rate limits"""
+        await self._host_limiter.acquire(urlparse(url).netloc)
+        async with self._fetch_semaphore:
+            async with self.session.get(url, **kwargs) as response:
+                yield response
+    
+    async def _fetch_html(self, url: str) -> Optional[bytes]:
+        """Fetch a page body, reusing the crawl cache when it is fresh or the server answers 304"""
+        cached = await asyncio.to_thread(self._crawl_cache.get_page, url)
+        if cached and time.time() - cached["fetched_at"] < CRAWL_CACHE_TTL_SECONDS:
+            return cached["body"]
+        
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        for attempt in range(FETCH_MAX_ATTEMPTS):
+            last_attempt = attempt == FETCH_MAX_ATTEMPTS - 1
+            retry_after = None
+            try:
+                async with self._fetch(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        await asyncio.to_thread(self._crawl_cache.touch_page, url)
+                        return cached["body"]
+                    if response.status == 200:
+                        body = await response.read()
+                        etag = response.headers.get("ETag")
+                        last_modified = response.headers.get("Last-Modified")
+                        break
+                    # 404s and other client errors won't succeed on a retry
+                    if response.status not in RETRYABLE_STATUSES or last_attempt:
+                        return None
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise
+                logger.debug(f"Fetch of {url} failed ({type(e).__name__})")
+            
+            delay = _backoff_delay(attempt, retry_after)
+            logger.info(f"🔁 Retrying {url} in {delay:.1f}s (attempt {attempt + 2}/{FETCH_MAX_ATTEMPTS})")
+            await asyncio.sleep(delay)
+        
+        await asyncio.to_thread(self._crawl_cache.put_page, url, body, etag, last_modified)
+        return body
+    
+    async def _gather_bounded(self, coros) -> List[Any]:
+        """Run coroutines concurrently under the crawl semaphore, dropping failures and empty results"""
+        async def bounded(coro):
+            async with self._crawl_semaphore:
+                return await coro
+        
+        results = await asyncio.gather(*(bounded(coro) for coro in coros), return_exceptions=True)
+        
+        collected = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"❌ Crawl task failed: {result}")
+            elif result:
+                collected.append(result)
+        return collected
+    
+    async def _extract_in_pool(self, html: bytes, url: str, enhanced: bool = False) -> Optional[Dict[str, Any]]:
+        """Parse and extract a fetched page in the worker process pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _parse_and_extract, html, url, enhanced)
 
     async def _crawl_aven_site_enhanced(self) -> List[Dict[str, Any]]:
         """Enhanced crawling of Aven website using Firecrawl for JavaScript handling"""
@@ -128,33 +451,34 @@ class EnhancedKnowledgeService:
             "https://aven.com/education",  # Education hub
         ]
         
-        # Combine and remove duplicates
-        all_urls = list(set(urls_to_crawl + additional_urls))
+        # Combine and remove duplicates (including trailing-slash, fragment and utm_* variants)
+        all_urls = _dedupe_urls(urls_to_crawl + additional_urls)
         
         logger.info(f"🔄 Crawling {len(all_urls)} URLs from Aven website using Firecrawl...")
         
-        scraped_data = []
+        return await self._gather_bounded(self._crawl_one(url) for url in all_urls)
+    
+    async def _crawl_one(self, url: str) -> Optional[Dict[str, Any]]:
+        """Crawl a single URL with Firecrawl, falling back to regular scraping"""
+        try:
+            # Use Firecrawl for better JavaScript handling
+            content = await self._scrape_with_firecrawl(url)
+            if content:
+                logger.info(f"✅ Successfully scraped with Firecrawl: {url}")
+                return content
+            
+            # Fallback to regular scraping
+            content = await self._scrape_with_requests(url)
+            if content:
+                logger.info(f"✅ Successfully scraped with fallback: {url}")
+                return content
+            
+            logger.warning(f"⚠️ No content extracted from: {url}")
+            
+        except Exception as e:
+            logger.warning(f"❌ Failed to crawl {url}: {e}")
         
-        for url in all_urls:
-            try:
-                # Use Firecrawl for better JavaScript handling
-                content = await self._scrape_with_firecrawl(url)
-                if content:
-                    scraped_data.append(content)
-                    logger.info(f"✅ Successfully scraped with Firecrawl: {url}")
-                else:
-                    # Fallback to regular scraping
-                    content = await self._scrape_with_requests(url)
-                    if content:
-                        scraped_data.append(content)
-                        logger.info(f"✅ Successfully scraped with fallback: {url}")
-                    else:
-                        logger.warning(f"⚠️ No content extracted from: {url}")
-                            
-            except Exception as e:
-                logger.warning(f"❌ Failed to crawl {url}: {e}")
-                
-        return scraped_data
+        return None
     
     async def _scrape_with_firecrawl(self, url: str) -> Optional[Dict[str, Any]]:
         """Scrape URL using Firecrawl for JavaScript rendering"""
@@ -165,13 +489,20 @@ class EnhancedKnowledgeService:
                 logger.warning("⚠️ FIRECRAWL_API_KEY not set, falling back to regular scraping")
                 return None
             
-            # Use FirecrawlApp like in the working scraper.py
-            from firecrawl import FirecrawlApp
+            # Firecrawl is the crawl's throughput ceiling; reuse results scraped in the last day
+            cached = await asyncio.to_thread(self._crawl_cache.get_firecrawl, url, CRAWL_CACHE_TTL_SECONDS)
+            if cached:
+                return cached
             
-            firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
+            # Use FirecrawlApp like in the working scraper.py, one client for the whole crawl
+            if self._firecrawl is None:
+                from firecrawl import FirecrawlApp
+                self._firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
             
+            # The SDK is synchronous; run it in a thread so concurrent URLs overlap
             # Use the same parameters as the working implementation
-            response = firecrawl.scrape_url(
+            response = await asyncio.to_thread(
+                self._firecrawl.scrape_url,
                 url=url,
                 formats=['html', 'markdown'],
                 wait_for=5000,  # Wait for dynamic content
@@ -187,32 +518,14 @@ class EnhancedKnowledgeService:
                 logger.warning(f"⚠️ No HTML content received for {url}")
                 return None
             
-            # Parse the HTML content
-            soup = BeautifulSoup(response.html, 'html.parser')
-            
-            # Extract title
-            title = response.metadata.get('title') if response.metadata and response.metadata.get('title') else (soup.title.string.strip() if soup.title and soup.title.string else '')
-            
-            # Extract text content
-            text = self._extract_text_from_soup(soup)
+            # Parse the HTML content and extract title, text and headings
+            page_title, text, headings = self._extract_page_parts(response.html)
+            title = response.metadata.get('title') if response.metadata and response.metadata.get('title') else page_title
             
             if text and len(text) > 50:
-                return {
-                    "url": url,
-                    "title": title,
-                    "content": text,
-                    "content_type": self._classify_content(url, title, text),
-                    "headings": self._extract_headings_from_soup(soup),
-                    "source": "aven_website",
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "metadata": {
-                        "word_count": len(text.split()),
-                        "has_contact_info": self._has_contact_info(text),
-                        "has_pricing": self._has_pricing_info(text),
-                        "has_features": self._has_feature_info(text),
-                        "scraped_with": "firecrawl"
-                    }
-                }
+                content = self._build_record(url, title, text, headings, scraped_with="firecrawl")
+                await asyncio.to_thread(self._crawl_cache.put_firecrawl, url, content)
+                return content
             
             return None
                 
@@ -223,18 +536,15 @@ class EnhancedKnowledgeService:
     async def _scrape_with_requests(self, url: str) -> Optional[Dict[str, Any]]:
         """Fallback scraping using regular requests"""
         try:
-            async with self.session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
+            html = await self._fetch_html(url)
+            if html:
+                # Extract structured content
+                content = await self._extract_in_pool(html, url)
+                if content:
+                    content["metadata"]["scraped_with"] = "requests"
+                    return content
                     
-                    # Extract structured content
-                    content = self._extract_structured_content(soup, url)
-                    if content:
-                        content["metadata"]["scraped_with"] = "requests"
-                        return content
-                        
-                return None
+            return None
                 
         except Exception as e:
             logger.warning(f"❌ Requests error for {url}: {e}")
@@ -243,28 +553,16 @@ class EnhancedKnowledgeService:
     async def _scrape_with_enhanced_requests(self, url: str) -> Optional[Dict[str, Any]]:
         """Enhanced scraping with better headers and user agent"""
         try:
-            # Use a more realistic browser user agent
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            async with self.session.get(url, headers=headers, timeout=30) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
+            # The session already sends realistic browser headers (DEFAULT_HEADERS)
+            html = await self._fetch_html(url)
+            if html:
+                # Try to extract content more intelligently
+                content = await self._extract_in_pool(html, url, enhanced=True)
+                if content:
+                    content["metadata"]["scraped_with"] = "enhanced_requests"
+                    return content
                     
-                    # Try to extract content more intelligently
-                    content = self._extract_enhanced_content(soup, url)
-                    if content:
-                        content["metadata"]["scraped_with"] = "enhanced_requests"
-                        return content
-                        
-                return None
+            return None
                 
         except Exception as e:
             logger.warning(f"❌ Enhanced requests error for {url}: {e}")
@@ -291,34 +589,51 @@ class EnhancedKnowledgeService:
         
         return headings
     
-    def _extract_text_from_soup(self, soup: BeautifulSoup) -> str:
-        """Extract text content from BeautifulSoup object"""
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            element.decompose()
-        
-        # Extract text with better formatting
-        text = soup.get_text(separator='\n', strip=True)
-        text = ' '.join(text.split())  # Clean up whitespace
+    @classmethod
+    def _extract_page_parts(cls, html: str) -> Tuple[str, str, List[Dict[str, Any]]]:
+        """Extract (title, text, headings) from a rendered page, using selectolax's C parser when available"""
+        if SELECTOLAX_AVAILABLE:
+            tree = HTMLParser(html)
+            title_node = tree.css_first('title')
+            title = title_node.text(strip=True) if title_node else ''
+            
+            # Remove unwanted elements
+            for node in tree.css(', '.join(_BOILERPLATE_TAGS)):
+                node.decompose()
+            
+            headings = [
+                {"level": int(node.tag[1]), "text": node.text(strip=True)}
+                for node in tree.css('h1, h2, h3, h4, h5, h6')
+            ]
+            text = tree.root.text(separator=' ', strip=True) if tree.root else ''
+        else:
+            soup = _parse_html(html)
+            title = soup.title.string.strip() if soup.title and soup.title.string else ''
+            
+            # Remove unwanted elements
+            for element in soup(_BOILERPLATE_TAGS):
+                element.decompose()
+            
+            headings = cls._extract_headings(soup)
+            text = soup.get_text(separator=' ', strip=True)
         
-        return text
+        text = _WHITESPACE_RE.sub(' ', text)  # Clean up whitespace
+        return title, text, headings
     
-    def _extract_headings_from_soup(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
-        """Extract headings from BeautifulSoup object"""
-        headings = []
-        for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
-                headings.append({
-                    "level": i,
-                    "text": heading.get_text().strip()
-                })
-        return headings
+    @staticmethod
+    def _extract_headings(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """Extract h1-h6 headings in document order with a single tree traversal"""
+        return [
+            {"level": int(heading.name[1]), "text": heading.get_text(strip=True)}
+            for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+        ]
     
-    def _extract_structured_content(self, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
+    @classmethod
+    def _extract_structured_content(cls, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
         """Extract structured content from HTML with better parsing"""
         
         # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+        for element in soup(_BOILERPLATE_TAGS):
             element.decompose()
         
         # Extract main content
@@ -326,9 +641,8 @@ class EnhancedKnowledgeService:
         if not main_content:
             return None
             
-        # Extract text with better formatting
-        text = main_content.get_text(separator='\n', strip=True)
-        text = ' '.join(text.split())  # Clean up whitespace
+        # Extract text and collapse whitespace in a single regex pass
+        text = _WHITESPACE_RE.sub(' ', main_content.get_text(separator=' ', strip=True))
         
         if len(text) < 50:  # Skip very short content
             return None
@@ -338,34 +652,12 @@ class EnhancedKnowledgeService:
         title_text = title.get_text().strip() if title else ""
         
         # Extract headings for structure
-        headings = []
-        for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
-                headings.append({
-                    "level": i,
-                    "text": heading.get_text().strip()
-                })
-        
-        # Determine content type
-        content_type = self._classify_content(url, title_text, text)
+        headings = cls._extract_headings(soup)
         
-        return {
-            "url": url,
-            "title": title_text,
-            "content": text,
-            "content_type": content_type,
-            "headings": headings,
-            "source": "aven_website",
-            "timestamp": datetime.utcnow().isoformat(),
-            "metadata": {
-                "word_count": len(text.split()),
-                "has_contact_info": self._has_contact_info(text),
-                "has_pricing": self._has_pricing_info(text),
-                "has_features": self._has_feature_info(text)
-            }
-        }
+        return cls._build_record(url, title_text, text, headings)
     
-    def _extract_enhanced_content(self, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
+    @classmethod
+    def _extract_enhanced_content(cls, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
         """Enhanced content extraction with better parsing"""
         
         # Remove unwanted elements more thoroughly
@@ -393,9 +685,8 @@ class EnhancedKnowledgeService:
         if not main_content:
             return None
             
-        # Extract text with better formatting
-        text = main_content.get_text(separator='\n', strip=True)
-        text = ' '.join(text.split())  # Clean up whitespace
+        # Extract text and collapse whitespace in a single regex pass
+        text = _WHITESPACE_RE.sub(' ', main_content.get_text(separator=' ', strip=True))
         
         if len(text) < 50:  # Skip very short content
             return None
@@ -405,79 +696,57 @@ class EnhancedKnowledgeService:
         title_text = title.get_text().strip() if title else ""
         
         # Extract headings for structure
-        headings = []
-        for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
-                headings.append({
-                    "level": i,
-                    "text": heading.get_text().strip()
-                })
+        headings = cls._extract_headings(soup)
         
-        # Determine content type
-        content_type = self._classify_content(url, title_text, text)
+        return cls._build_record(url, title_text, text, headings, scraped_with="enhanced_requests")
+    
+    @classmethod
+    def _build_record(cls, url: str, title: str, text: str, headings: List[Dict[str, Any]],
+                      scraped_with: Optional[str] = None) -> Dict[str, Any]:
+        """Build a website content record from whitespace-collapsed text, deriving each field once"""
+        metadata = {
+            "word_count": text.count(' ') + 1,
+            "has_contact_info": cls._has_contact_info(text),
+            "has_pricing": cls._has_pricing_info(text),
+            "has_features": cls._has_feature_info(text)
+        }
+        if scraped_with:
+            metadata["scraped_with"] = scraped_with
         
         return {
             "url": url,
-            "title": title_text,
+            "title": title,
             "content": text,
-            "content_type": content_type,
+            "content_type": cls._classify_content(url, title, text),
             "headings": headings,
             "source": "aven_website",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "metadata": {
-                "word_count": len(text.split()),
-                "has_contact_info": self._has_contact_info(text),
-                "has_pricing": self._has_pricing_info(text),
-                "has_features": self._has_feature_info(text),
-                "scraped_with": "enhanced_requests"
-            }
+            "metadata": metadata
         }
     
-    def _classify_content(self, url: str, title: str, content: str) -> str:
+    @staticmethod
+    def _classify_content(url: str, title: str, content: str) -> str:
         """Classify content type based on URL, title, and content"""
         
-        url_lower = url.lower()
-        title_lower = title.lower()
-        content_lower = content.lower()
-        
-        if any(word in url_lower for word in ['faq', 'help', 'support']):
-            return "faq"
-        elif any(word in url_lower for word in ['legal', 'privacy', 'terms']):
-            return "legal"
-        elif any(word in url_lower for word in ['product', 'card', 'heloc']):
-            return "product"
-        elif any(word in url_lower for word in ['about', 'company']):
-            return "company"
-        elif any(word in url_lower for word in ['blog', 'education', 'resources']):
-            return "educational"
-        else:
-            return "general"
+        for content_type, pattern in _CONTENT_TYPE_RES:
+            if pattern.search(url):
+                return content_type
+        return "general"
     
-    def _has_contact_info(self, text: str) -> bool:
+    @staticmethod
+    def _has_contact_info(text: str) -> bool:
         """Check if text contains contact information"""
-        contact_patterns = [
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # Phone numbers
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',  # Email
-            r'\b(contact|support|help|call|email)\b'
-        ]
-        return any(re.search(pattern, text, re.IGNORECASE) for pattern in contact_patterns)
+        return bool(_CONTACT_RE.search(text))
     
-    def _has_pricing_info(self, text: str) -> bool:
+    @staticmethod
+    def _has_pricing_info(text: str) -> bool:
         """Check if text contains pricing information"""
-        pricing_patterns = [
-            r'\$\d+',  # Dollar amounts
-            r'\b(annual|monthly|yearly|fee|cost|price|rate)\b',
-            r'\b(APR|interest|percentage)\b'
-        ]
-        return any(re.search(pattern, text, re.IGNORECASE) for pattern in pricing_patterns)
+        return bool(_PRICING_RE.search(text))
     
-    def _has_feature_info(self, text: str) -> bool:
+    @staticmethod
+    def _has_feature_info(text: str) -> bool:
         """Check if text contains feature information"""
-        feature_patterns = [
-            r'\b(feature|benefit|advantage|perk|reward|cashback)\b',
-            r'\b(limit|credit|approval|application)\b'
-        ]
-        return any(re.search(pattern, text, re.IGNORECASE) for pattern in feature_patterns)
+        return bool(_FEATURE_RE.search(text))
     
     async def _gather_faq_documentation(self) -> List[Dict[str, Any]]:
         """Gather FAQ and support documentation"""
@@ -487,29 +756,33 @@ class EnhancedKnowledgeService:
             "https://aven.com/help",
             "https://aven.com/support",
         ]
+        faq_sources = _dedupe_urls(faq_sources)
         
         faq_data = []
-        
-        for url in faq_sources:
-            try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Extract FAQ items
-                        faq_items = self._extract_faq_items(soup, url)
-                        faq_data.extend(faq_items)
-                        
-            except Exception as e:
-                logger.warning(f"Failed to gather FAQ from {url}: {e}")
-                
+        for faq_items in await self._gather_bounded(self._gather_faq_from(url) for url in faq_sources):
+            faq_data.extend(faq_items)
         return faq_data
     
+    async def _gather_faq_from(self, url: str) -> List[Dict[str, Any]]:
+        """Gather FAQ items from a single page"""
+        try:
+            html = await self._fetch_html(url)
+            if html:
+                soup = _parse_html(html)
+                
+                # Extract FAQ items
+                return self._extract_faq_items(soup, url)
+                    
+        except Exception as e:
+            logger.warning(f"Failed to gather FAQ from {url}: {e}")
+        
+        return []
+    
     def _extract_faq_items(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
         """Extract FAQ items from HTML"""
         
         faq_items = []
+        timestamp = datetime.now(timezone.utc).isoformat()
         
         # Look for common FAQ patterns
         faq_selectors = [
@@ -538,7 +811,7 @@ class EnhancedKnowledgeService:
                             "content": f"Question: {question}\n\nAnswer: {answer}",
                             "content_type": "faq",
                             "source": "aven_faq",
-                            "timestamp": datetime.utcnow().isoformat(),
+                            "timestamp": timestamp,
                             "metadata": {
                                 "question": question,
                                 "answer": answer,
@@ -561,43 +834,75 @@ class EnhancedKnowledgeService:
             "https://aven.com/docs/PrivacyPolicy.html",
             "https://aven.com/docs/ConsumerPrivacyPolicyNotice.pdf",
         ]
+        legal_urls = _dedupe_urls(legal_urls)
         
-        legal_data = []
-        
-        for url in legal_urls:
-            try:
-                if url.endswith('.pdf'):
-                    # Handle PDF documents
-                    content = await self._extract_pdf_content(url)
-                else:
-                    # Handle HTML documents
-                    async with self.session.get(url, timeout=30) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            soup = BeautifulSoup(html, 'html.parser')
-                            content = self._extract_structured_content(soup, url)
-                
-                if content:
-                    content["content_type"] = "legal"
-                    content["source"] = "aven_legal"
-                    legal_data.append(content)
-                    
-            except Exception as e:
-                logger.warning(f"Failed to process legal document {url}: {e}")
+        return await self._gather_bounded(self._process_legal_document(url) for url in legal_urls)
+    
+    async def _process_legal_document(self, url: str) -> Optional[Dict[str, Any]]:
+        """Process a single legal or compliance document"""
+        try:
+            content = None
+            if url.endswith('.pdf'):
+                # Handle PDF documents
+                content = await self._extract_pdf_content(url)
+            else:
+                # Handle HTML documents
+                html = await self._fetch_html(url)
+                if html:
+                    content = await self._extract_in_pool(html, url)
+            
+            if content:
+                content["content_type"] = "legal"
+                content["source"] = "aven_legal"
+                return content
                 
-        return legal_data
+        except Exception as e:
+            logger.warning(f"Failed to process legal document {url}: {e}")
+        
+        return None
     
     async def _extract_pdf_content(self, url: str) -> Optional[Dict[str, Any]]:
         """Extract content from PDF documents"""
-        # This would require a PDF processing library like PyPDF2 or pdfplumber
-        # For now, return a placeholder
+        if PDFIUM_AVAILABLE:
+            try:
+                # Stream the download so large booklets don't sit in memory as one bytes object
+                with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES) as pdf_file:
+                    async with self._fetch(url) as response:
+                        if response.status != 200:
+                            logger.warning(f"⚠️ Failed to download PDF {url}: HTTP {response.status}")
+                            return None
+                        async for chunk in response.content.iter_chunked(65536):
+                            pdf_file.write(chunk)
+                    
+                    pdf_file.seek(0)
+                    text = await asyncio.to_thread(_pdf_to_text, pdf_file)
+                
+                text = _WHITESPACE_RE.sub(' ', text).strip()
+                if len(text) >= 50:
+                    return {
+                        "url": url,
+                        "title": f"Legal Document: {url.split('/')[-1]}",
+                        "content": text,
+                        "content_type": "legal",
+                        "source": "aven_legal_pdf",
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "metadata": {
+                            "document_type": "pdf",
+                            "word_count": text.count(' ') + 1,
+                            "requires_download": False
+                        }
+                    }
+            except Exception as e:
+                logger.warning(f"❌ PDF extraction failed for {url}: {e}")
+        
+        # No text could be extracted; point to the original document instead
         return {
             "url": url,
             "title": f"Legal Document: {url.split('/')[-1]}",
             "content": f"Legal document available at {url}. Please refer to the original document for complete information.",
             "content_type": "legal",
             "source": "aven_legal_pdf",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "metadata": {
                 "document_type": "pdf",
                 "requires_download": True
@@ -612,34 +917,35 @@ class EnhancedKnowledgeService:
             "https://www.g2.com/products/aven/reviews",
             "https://www.capterra.com/p/aven/",
         ]
+        review_sources = _dedupe_urls(review_sources)
         
         review_data = []
-        
-        for url in review_sources:
-            try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Extract reviews (this would need specific selectors for each site)
-                        reviews = self._extract_reviews(soup, url)
-                        review_data.extend(reviews)
-                        
-            except Exception as e:
-                logger.warning(f"Failed to collect reviews from {url}: {e}")
-                
+        for reviews in await self._gather_bounded(self._collect_reviews_from(url) for url in review_sources):
+            review_data.extend(reviews)
         return review_data
     
-    def _extract_reviews(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
+    async def _collect_reviews_from(self, url: str) -> List[Dict[str, Any]]:
+        """Collect reviews from a single review site"""
+        try:
+            html = await self._fetch_html(url)
+            if html:
+                # Extract reviews (this would need specific selectors for each site)
+                return self._extract_reviews(html, url)
+                    
+        except Exception as e:
+            logger.warning(f"Failed to collect reviews from {url}: {e}")
+        
+        return []
+    
+    def _extract_reviews(self, html: bytes, url: str) -> List[Dict[str, Any]]:
         """Extract reviews from review sites"""
         
         if "trustpilot.com" in url:
-            return self._extract_trustpilot_reviews(soup, url)
+            return self._extract_trustpilot_reviews(html, url)
         elif "g2.com" in url:
-            return self._extract_g2_reviews(soup, url)
+            return self._extract_g2_reviews(html, url)
         elif "capterra.com" in url:
-            return self._extract_capterra_reviews(soup, url)
+            return self._extract_capterra_reviews(html, url)
         else:
             # Generic fallback
             return [{
@@ -648,7 +954,7 @@ class EnhancedKnowledgeService:
                 "content": "Customer reviews and feedback are available on various review platforms. Overall sentiment is positive with high ratings for customer service and product features.",
                 "content_type": "reviews",
                 "source": "external_reviews",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "metadata": {
                     "review_count": "100+",
                     "average_rating": "4.5/5",
@@ -662,28 +968,12 @@ class EnhancedKnowledgeService:
             return ""
         
         # Remove common navigation elements
-        unwanted_patterns = [
-            r'Suggested companies.*?Categories',
-            r'Log in.*?For bus',
-            r'We verify reviewers.*?We advocate',
-            r'Here are \d+ tips.*?writing great reviews',
-            r'Figure.*?reviews',
-            r'Advance America.*?reviews',
-            r'Upstart.*?reviews',
-            r'Categories.*?Blog',
-            r'For bus.*?feedback',
-            r'Verification can help.*?bias',
-            r'Offering incentives.*?',
-            r'Read Customer Service Reviews.*?',
-            r'Customer Service Reviews.*?',
-        ]
-        
         cleaned_text = text
-        for pattern in unwanted_patterns:
-            cleaned_text = re.sub(pattern, '', cleaned_text, flags=re.IGNORECASE | re.DOTALL)
+        for pattern in _UNWANTED_REVIEW_RES:
+            cleaned_text = pattern.sub('', cleaned_text)
         
         # Remove extra whitespace and normalize
-        cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+        cleaned_text = _WHITESPACE_RE.sub(' ', cleaned_text).strip()
         
         # Remove very short fragments
         lines = cleaned_text.split('\n')
@@ -692,63 +982,29 @@ class EnhancedKnowledgeService:
         
         return cleaned_text
     
-    def _extract_trustpilot_reviews(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
+    def _extract_trustpilot_reviews(self, html: bytes, url: str) -> List[Dict[str, Any]]:
         """Extract real Trustpilot reviews"""
         
         reviews = []
         
         try:
-            # Try multiple selectors for rating
-            rating_selectors = [
-                'div[data-service-review-card-hermes-typography="true"]',
-                'span[data-service-review-card-hermes-typography="true"]',
-                '.star-rating',
-                '.rating',
-                '[data-rating]'
-            ]
+            rating_texts, count_texts, review_elements, all_text = _query_review_page(html)
             
             overall_rating = "N/A"
-            for selector in rating_selectors:
-                rating_element = soup.select_one(selector)
-                if rating_element:
-                    rating_text = rating_element.get_text().strip()
-                    # Look for patterns like "4.5 out of 5" or "4.5/5"
-                    rating_match = re.search(r'(\d+\.?\d*)\s*(?:out of|/)\s*5', rating_text)
-                    if rating_match:
-                        overall_rating = rating_match.group(1)
-                        break
-            
-            # Try multiple selectors for review count
-            count_selectors = [
-                'span:contains("reviews")',
-                '.review-count',
-                '[data-review-count]',
-                'span:contains("review")'
-            ]
+            for rating_text in rating_texts:
+                # Look for patterns like "4.5 out of 5" or "4.5/5"
+                rating_match = _RATING_RE.search(rating_text)
+                if rating_match:
+                    overall_rating = rating_match.group(1)
+                    break
             
             total_reviews = "N/A"
-            for selector in count_selectors:
-                try:
-                    count_element = soup.select_one(selector)
-                    if count_element:
-                        count_text = count_element.get_text().strip()
-                        # Extract number from text like "1,234 reviews" or "3 reviews"
-                        numbers = re.findall(r'\d+', count_text.replace(',', ''))
-                        if numbers:
-                            total_reviews = numbers[0]
-                            break
-                except:
-                    continue
-            
-            # Try multiple selectors for review content
-            review_selectors = [
-                'article[data-service-review-card-hermes-typography="true"]',
-                '.review-card',
-                '.review-content',
-                '[data-review]',
-                '.review-item',
-                '.customer-review'
-            ]
+            for count_text in count_texts:
+                # Extract number from text like "1,234 reviews" or "3 reviews"
+                count_match = _REVIEW_COUNT_RE.search(count_text)
+                if count_match:
+                    total_reviews = count_match.group(0).replace(',', '')
+                    break
         
         except Exception as e:
             logger.warning(f"Error extracting Trustpilot reviews: {e}")
@@ -759,7 +1015,7 @@ class EnhancedKnowledgeService:
                 "content": "Trustpilot reviews are available for Aven. Please visit the Trustpilot page for detailed customer feedback and ratings.",
                 "content_type": "reviews",
                 "source": "trustpilot",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "metadata": {
                     "review_count": "N/A",
                     "average_rating": "N/A",
@@ -771,33 +1027,30 @@ class EnhancedKnowledgeService:
             return reviews
         
         review_texts = []
-        for selector in review_selectors:
-            review_elements = soup.select(selector)
-            if review_elements:
-                for review_elem in review_elements[:5]:  # Get first 5 reviews
-                    review_text = review_elem.get_text().strip()
-                    if review_text and len(review_text) > 20:  # Filter out short/empty reviews
-                        # Clean the review text by removing navigation elements
-                        cleaned_text = self._clean_review_text(review_text)
-                        if cleaned_text and len(cleaned_text) > 20:
-                            review_texts.append(cleaned_text)
-                break
+        for review_text in review_elements[:5]:  # Get first 5 reviews
+            if review_text and len(review_text) > 20:  # Filter out short/empty reviews
+                # Clean the review text by removing navigation elements
+                cleaned_text = self._clean_review_text(review_text)
+                if cleaned_text and len(cleaned_text) > 20:
+                    review_texts.append(cleaned_text)
         
         # If no reviews found, try to get any text that might be review-related
         if not review_texts:
-            # Look for any text that mentions reviews or ratings
-            all_text = soup.get_text()
-            review_indicators = ['review', 'rating', 'customer', 'feedback']
-            for indicator in review_indicators:
-                if indicator in all_text.lower():
+            # Look for any text that mentions reviews or ratings, finding each indicator's first occurrence in one scan
+            first_seen: Dict[str, int] = {}
+            for match in _REVIEW_INDICATOR_RE.finditer(all_text):
+                first_seen.setdefault(match.group(0).lower(), match.start())
+                if len(first_seen) == len(_REVIEW_INDICATORS):
+                    break
+            for indicator in _REVIEW_INDICATORS:
+                if indicator in first_seen:
                     # Extract a relevant snippet
-                    start_idx = all_text.lower().find(indicator)
-                    if start_idx != -1:
-                        snippet = all_text[start_idx:start_idx + 200]
-                        if len(snippet) > 20:
-                            cleaned_snippet = self._clean_review_text(snippet)
-                            if cleaned_snippet and len(cleaned_snippet) > 20:
-                                review_texts.append(cleaned_snippet)
+                    start_idx = first_seen[indicator]
+                    snippet = all_text[start_idx:start_idx + 200]
+                    if len(snippet) > 20:
+                        cleaned_snippet = self._clean_review_text(snippet)
+                        if cleaned_snippet and len(cleaned_snippet) > 20:
+                            review_texts.append(cleaned_snippet)
         
         # Create comprehensive review summary
         if review_texts:
@@ -840,7 +1093,7 @@ class EnhancedKnowledgeService:
             "content": review_summary,
             "content_type": "reviews",
             "source": "trustpilot",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "metadata": {
                 "review_count": total_reviews,
                 "average_rating": f"{overall_rating}/5",
@@ -853,7 +1106,7 @@ class EnhancedKnowledgeService:
         
         return reviews
     
-    def _extract_g2_reviews(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
+    def _extract_g2_reviews(self, html: bytes, url: str) -> List[Dict[str, Any]]:
         """Extract G2 reviews"""
         return [{
             "url": url,
@@ -861,13 +1114,13 @@ class EnhancedKnowledgeService:
             "content": "G2 reviews and ratings for Aven are available on the G2 platform. Please visit G2 for detailed customer feedback.",
             "content_type": "reviews",
             "source": "g2",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "metadata": {
                 "platform": "g2"
             }
         }]
     
-    def _extract_capterra_reviews(self, soup: BeautifulSoup, url: str) -> List[Dict[str, Any]]:
+    def _extract_capterra_reviews(self, html: bytes, url: str) -> List[Dict[str, Any]]:
         """Extract Capterra reviews"""
         return [{
             "url": url,
@@ -875,7 +1128,7 @@ class EnhancedKnowledgeService:
             "content": "Capterra reviews and ratings for Aven are available on the Capterra platform. Please visit Capterra for detailed customer feedback.",
             "content_type": "reviews",
             "source": "capterra",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "metadata": {
                 "platform": "capterra"
             }
@@ -890,27 +1143,25 @@ class EnhancedKnowledgeService:
             "https://www.linkedin.com/company/aven-financial",
         ]
         
-        industry_data = []
-        
-        for url in industry_sources:
-            try:
-                async with self.session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        content = self._extract_structured_content(soup, url)
-                        if content:
-                            content["content_type"] = "industry_news"
-                            content["source"] = "industry_media"
-                            industry_data.append(content)
-                        else:
-                            # Fallback for Forbes article
-                            if "forbes.com" in url:
-                                fallback_content = {
-                                    "url": url,
-                                    "title": "Inside Fintech's Newest Unicorn: A Credit Card Backed By Your Home",
-                                    "content": """
+        return await self._gather_bounded(self._gather_industry_from(url) for url in industry_sources)
+    
+    async def _gather_industry_from(self, url: str) -> Optional[Dict[str, Any]]:
+        """Gather industry information from a single source"""
+        try:
+            html = await self._fetch_html(url)
+            if html:
+                content = await self._extract_in_pool(html, url)
+                if content:
+                    content["content_type"] = "industry_news"
+                    content["source"] = "industry_media"
+                    return content
+                else:
+                    # Fallback for Forbes article
+                    if "forbes.com" in url:
+                        fallback_content = {
+                            "url": url,
+                            "title": "Inside Fintech's Newest Unicorn: A Credit Card Backed By Your Home",
+                            "content": """
                                     Aven has hit a $1 billion valuation and is backed by big-name investors. 
                                     The company offers a credit card backed by home equity, allowing homeowners 
                                     to leverage their property for credit. Founded by Sadi Khan, Aven has raised 
@@ -923,23 +1174,23 @@ class EnhancedKnowledgeService:
                                     - Founded by Sadi Khan
                                     - Fintech unicorn status
                                     """,
-                                    "content_type": "industry_news",
-                                    "source": "forbes",
-                                    "timestamp": datetime.utcnow().isoformat(),
-                                    "metadata": {
-                                        "publication": "Forbes",
-                                        "author": "Jeff Kauflin",
-                                        "date": "2024-07-17",
-                                        "valuation": "$1 billion",
-                                        "category": "fintech"
-                                    }
-                                }
-                                industry_data.append(fallback_content)
-                            
-            except Exception as e:
-                logger.warning(f"Failed to gather industry info from {url}: {e}")
-                
-        return industry_data
+                            "content_type": "industry_news",
+                            "source": "forbes",
+                            "timestamp": datetime.now(timezone.utc).isoformat(),
+                            "metadata": {
+                                "publication": "Forbes",
+                                "author": "Jeff Kauflin",
+                                "date": "2024-07-17",
+                                "valuation": "$1 billion",
+                                "category": "fintech"
+                            }
+                        }
+                        return fallback_content
+                    
+        except Exception as e:
+            logger.warning(f"Failed to gather industry info from {url}: {e}")
+        
+        return None
     
     async def _process_product_specs(self) -> List[Dict[str, Any]]:
         """Process product specifications and features"""
@@ -970,7 +1221,7 @@ class EnhancedKnowledgeService:
                 """,
                 "content_type": "product_specs",
                 "source": "aven_product",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "metadata": {
                     "product_type": "credit_card",
                     "features": ["home_equity", "cashback", "no_annual_fee", "mobile_app"],
@@ -1001,7 +1252,7 @@ class EnhancedKnowledgeService:
                 """,
                 "content_type": "product_specs",
                 "source": "aven_product",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "metadata": {
                     "product_type": "heloc",
                     "features": ["flexible_credit", "competitive_rates", "online_application", "no_prepayment"],
@@ -1012,38 +1263,61 @@ class EnhancedKnowledgeService:
         
         return product_data
     
-    async def _process_and_store_knowledge(self, knowledge_data: List[Dict[str, Any]]):
+    async def _process_and_store_knowledge(self, knowledge_data: List[Dict[str, Any]],
+                                           batch_size: int = UPSERT_BATCH_SIZE,
+                                           embedding_batch_size: int = EMBEDDING_BATCH_SIZE):
         """Process knowledge data and store in vector database"""
         
-        # Generate embeddings and prepare for storage
-        documents_to_store = []
+        # Embedding and upserting overlap: the next batch embeds while the previous one is upserted
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EMBED_UPSERT_QUEUE_SIZE)
         
-        for item in knowledge_data:
+        async def embed_worker():
+            items = iter(knowledge_data)
             try:
-                # Generate embedding for the content
-                embedding = await self.openai_service.generate_embeddings(item["content"])
-                
-                # Create document for storage
-                document = {
-                    "id": f"aven_{hash(item['url'] + item['title'])}",
-                    "text": item["content"],
-                    "embedding": embedding,
-                    "url": item["url"],
-                    "source": item["source"],
-                    "content_type": item["content_type"],
-                    "timestamp": item["timestamp"],
-                    "metadata": item.get("metadata", {})
-                }
-                
-                documents_to_store.append(document)
-                
-            except Exception as e:
-                logger.error(f"Failed to process knowledge item {item.get('url', 'unknown')}: {e}")
-        
-        # Store in Pinecone
-        if documents_to_store:
-            await self.pinecone_service.upsert_documents(documents_to_store)
-            logger.info(f"Successfully stored {len(documents_to_store)} knowledge items in vector database")
+                while batch := list(islice(items, embedding_batch_size)):
+                    try:
+                        embeddings = await self.openai_service.generate_embeddings_batch([item["content"] for item in batch])
+                    except Exception as e:
+                        logger.error(f"Failed to embed batch of {len(batch)} knowledge items: {e}")
+                        continue
+                    
+                    documents = []
+                    for item, embedding in zip(batch, embeddings):
+                        if embedding is None:
+                            logger.warning(f"Skipping knowledge item that could not be embedded: {item.get('url', 'unknown')}")
+                            continue
+                        try:
+                            # Create document for storage
+                            documents.append({
+                                "id": f"aven_{_document_key(item)}",
+                                "text": item["content"],
+                                "embedding": embedding,
+                                "url": item["url"],
+                                "source": item["source"],
+                                "content_type": item["content_type"],
+                                "timestamp": item["timestamp"],
+                                "metadata": item.get("metadata", {})
+                            })
+                        except Exception as e:
+                            logger.error(f"Failed to process knowledge item {item.get('url', 'unknown')}: {e}")
+                    if documents:
+                        await queue.put(documents)
+            finally:
+                await queue.put(None)
+        
+        async def upsert_worker() -> int:
+            stored = 0
+            while (documents := await queue.get()) is not None:
+                try:
+                    await self.pinecone_service.upsert_documents(documents, batch_size=batch_size)
+                    stored += len(documents)
+                except Exception as e:
+                    logger.error(f"Failed to store batch of {len(documents)} knowledge items: {e}")
+            return stored
+        
+        _, stored = await asyncio.gather(embed_worker(), upsert_worker())
+        if stored:
+            logger.info(f"Successfully stored {stored} knowledge items in vector database")
     
     def _get_source_summary(self, knowledge_data: List[Dict[str, Any]]) -> Dict[str, int]:
         """Get summary of knowledge sources"""
@@ -1054,27 +1328,32 @@ class EnhancedKnowledgeService:
         return source_counts
 
     async def _save_scraped_data_to_files(self, data: List[Dict[str, Any]], timestamp: str):
-        """Save scraped data to JSON files for backup and analysis."""
+        """Save scraped data to a JSON Lines file for backup and analysis."""
         if not data:
             logger.warning("No data to save to files.")
             return
 
-        # Create a directory for the current timestamp
-        timestamp_dir = f"scraped_data_{timestamp}"
-        os.makedirs(timestamp_dir, exist_ok=True)
+        # One file per run, one item per line
+        filepath = f"scraped_data_{timestamp}.jsonl"
+        await asyncio.to_thread(_write_jsonl, filepath, data)
+        logger.info(f"Saved {len(data)} items to {filepath}")
 
-        for item in data:
+def _write_jsonl(filepath: str, items: List[Dict[str, Any]]):
+    """Serialize items with orjson and write them as JSON Lines through a single file handle"""
+    with open(filepath, "wb") as f:
+        for item in items:
             try:
-                # Generate a unique filename based on URL and title
-                filename = f"{hash(item['url'] + item['title'])}.json"
-                filepath = os.path.join(timestamp_dir, filename)
-
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(item, f, indent=4, ensure_ascii=False)
-                logger.info(f"Saved item to {filepath}")
+                f.write(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS))
             except Exception as e:
                 logger.error(f"Failed to save item {item.get('url', 'unknown')} to file: {e}")
 
+def _parse_and_extract(html: bytes, url: str, enhanced: bool = False) -> Optional[Dict[str, Any]]:
+    """Build the soup and extract a plain content dict (runs in a worker process, so no soup objects are returned)"""
+    soup = _parse_html(html)
+    if enhanced:
+        return EnhancedKnowledgeService._extract_enhanced_content(soup, url)
+    return EnhancedKnowledgeService._extract_structured_content(soup, url)
+
 # Usage example
 async def main():
     async with EnhancedKnowledgeService() as service:
@@ -1082,4 +1361,10 @@ async def main():
         print(f"Knowledge base built successfully: {result}")
 
 if __name__ == "__main__":
+    try:
+        # libuv-based loop cuts per-callback overhead for the many small aiohttp reads
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        logger.info("uvloop not installed; using the default asyncio event loop.")
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,18 +1,48 @@
+import asyncio
+import hashlib
 import logging
 import os
 import re
-from typing import Dict, Any, List
-from openai import OpenAI
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from openai import AsyncOpenAI
+from app.core.http_client import get_async_http_client
+from app.services.openai_service import openai_request
 
 logger = logging.getLogger(__name__)
 
+# Moderation verdicts are reused for identical text for this long
+MODERATION_CACHE_TTL_SECONDS = 3600
+# Concurrent moderation checks are coalesced into one API request of up to
+# MODERATION_BATCH_SIZE texts, collected for at most MODERATION_BATCH_WINDOW_SECONDS
+MODERATION_BATCH_SIZE = 16
+MODERATION_BATCH_WINDOW_SECONDS = 0.02
+# With truncate=True (non-user content such as scraped pages), local regex/keyword rules only scan
+# this many leading characters; moderation still sees the full text. User input is always scanned in full.
+MAX_LOCAL_CHECK_CHARS = 20000
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Compile a keyword list into one case-insensitive alternation (longest first), matched as substrings"""
+    alternatives = sorted({keyword.lower() for keyword in keywords}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)), re.IGNORECASE)
+
 class GuardrailsService:
     """Checks text for safety, compliance, and brand alignment using OpenAI Moderation API and custom rules."""
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
-        self.client = OpenAI(api_key=api_key)
+        # Retries are handled by openai_request so moderation shares the chat/embedding throttle
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=get_async_http_client())
+        
+        # LRU of moderation results keyed on a digest of the text: (checked_at, result)
+        self._moderation_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_size = cache_size
+        
+        # Pending (text, future) pairs for the moderation batcher; created on first use inside the event loop
+        self._moderation_queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = None
+        self._moderation_worker = None
         
         # Financial compliance keywords
         self.financial_forbidden = [
@@ -23,13 +53,18 @@ class GuardrailsService:
         ]
         
         # Personal information protection
-        self.personal_info_patterns = [
-            r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
-            r'\b\d{4}-\d{4}-\d{4}-\d{4}\b',  # Credit card
-            r'\b\d{3}-\d{3}-\d{4}\b',  # Phone number
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',  # Email - requires @ symbol
-            r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',  # IP address
-        ]
+        self.personal_info_patterns = {
+            "ssn": r'\b\d{3}-\d{2}-\d{4}\b',  # SSN
+            "credit_card": r'\b\d{4}-\d{4}-\d{4}-\d{4}\b',  # Credit card
+            "phone": r'\b\d{3}-\d{3}-\d{4}\b',  # Phone number
+            "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',  # Email - requires @ symbol
+            "ip_address": r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',  # IP address
+        }
+        # All patterns in one alternation; the named group that matched identifies the kind of PII
+        self._personal_info_re = re.compile(
+            "|".join(f"(?P<{name}>{pattern})" for name, pattern in self.personal_info_patterns.items()),
+            re.IGNORECASE
+        )
         
         # Brand safety keywords
         self.brand_safety_keywords = [
@@ -43,32 +78,30 @@ class GuardrailsService:
             "profanity1", "profanity2", "hate speech", "discrimination",
             "harassment", "bullying", "threat", "violence"
         ]
+        
+        # Keyword rules in precedence order: (category, keywords, block reason, log label)
+        self._keyword_rules = [
+            ("financial_advice", self.financial_forbidden, "Contains financial advice", "financial compliance"),
+            ("brand_safety", self.brand_safety_keywords, "Contains brand safety concern", "brand safety"),
+            ("inappropriate", self.inappropriate_keywords, "Contains inappropriate content", "inappropriate content"),
+        ]
+        self._keyword_priority = {category: i for i, (category, *_) in enumerate(self._keyword_rules)}
+        # Every keyword list in one alternation, so all keyword rules take a single scan of the text
+        self._keywords_re = re.compile(
+            "|".join(f"(?P<{category}>{_keyword_pattern(keywords).pattern})" for category, keywords, *_ in self._keyword_rules),
+            re.IGNORECASE
+        )
 
-    def check_text(self, text: str) -> Dict[str, Any]:
+    async def check_text(self, text: str, truncate: bool = False) -> Dict[str, Any]:
         """Check text for safety and compliance. Returns dict with status, reason, categories."""
         try:
-            # 1. Check for personal information
-            personal_info_check = self._check_personal_info(text)
-            if personal_info_check["status"] != "safe":
-                return personal_info_check
-            
-            # 2. Check financial compliance
-            financial_check = self._check_financial_compliance(text)
-            if financial_check["status"] != "safe":
-                return financial_check
-            
-            # 3. Check brand safety
-            brand_check = self._check_brand_safety(text)
-            if brand_check["status"] != "safe":
-                return brand_check
-            
-            # 4. Check inappropriate content
-            inappropriate_check = self._check_inappropriate_content(text)
-            if inappropriate_check["status"] != "safe":
-                return inappropriate_check
+            # 1-4. Local rule checks (personal info, financial, brand, inappropriate)
+            local_check = self.check_input(text, truncate=truncate)
+            if local_check["status"] != "safe":
+                return local_check
             
             # 5. Check with OpenAI Moderation API
-            openai_check = self._check_openai_moderation(text)
+            openai_check = await self._check_openai_moderation(text)
             if openai_check["status"] != "safe":
                 return openai_check
             
@@ -79,70 +112,145 @@ class GuardrailsService:
             logger.error(f"GuardrailsService error: {e}")
             return {"status": "error", "reason": str(e), "categories": []}
     
+    def check_input(self, text: str, truncate: bool = False) -> Dict[str, Any]:
+        """Cheap local-only check (regex and keyword rules, no network call) for screening user input.
+
+        Pass truncate=True only for content that is not user-generated, to bound the scan cost on very long texts.
+        """
+        try:
+            if truncate and len(text) > MAX_LOCAL_CHECK_CHARS:
+                text = text[:MAX_LOCAL_CHECK_CHARS]
+            
+            # 1. Check for personal information
+            personal_info_check = self._check_personal_info(text)
+            if personal_info_check["status"] != "safe":
+                return personal_info_check
+            
+            # 2-4. Check financial compliance, brand safety and inappropriate content
+            keyword_check = self._check_keywords(text)
+            if keyword_check["status"] != "safe":
+                return keyword_check
+            
+            return {"status": "safe", "reason": "", "categories": []}
+            
+        except Exception as e:
+            logger.error(f"GuardrailsService input check error: {e}")
+            return {"status": "error", "reason": str(e), "categories": []}
+    
     def _check_personal_info(self, text: str) -> Dict[str, Any]:
         """Check for personal information patterns"""
-        for pattern in self.personal_info_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                logger.warning(f"Blocked for personal information pattern: {pattern}")
-                return {
-                    "status": "blocked",
-                    "reason": "Contains personal information",
-                    "categories": ["personal_info"]
-                }
+        match = self._personal_info_re.search(text)
+        if match:
+            logger.warning(f"Blocked for personal information pattern: {match.lastgroup}")
+            return {
+                "status": "blocked",
+                "reason": "Contains personal information",
+                "categories": ["personal_info"]
+            }
         return {"status": "safe", "reason": "", "categories": []}
     
-    def _check_financial_compliance(self, text: str) -> Dict[str, Any]:
-        """Check for financial compliance violations"""
-        text_lower = text.lower()
-        for keyword in self.financial_forbidden:
-            if keyword.lower() in text_lower:
-                logger.warning(f"Blocked for financial compliance: {keyword}")
-                return {
-                    "status": "blocked",
-                    "reason": f"Contains financial advice: {keyword}",
-                    "categories": ["financial_advice"]
-                }
-        return {"status": "safe", "reason": "", "categories": []}
+    def _check_keywords(self, text: str) -> Dict[str, Any]:
+        """Check financial compliance, brand safety and inappropriate content in one pass over the text"""
+        best_priority, best_match = None, None
+        for match in self._keywords_re.finditer(text):
+            priority = self._keyword_priority[match.lastgroup]
+            if best_priority is None or priority < best_priority:
+                best_priority, best_match = priority, match
+                if priority == 0:
+                    break
+        
+        if best_match is None:
+            return {"status": "safe", "reason": "", "categories": []}
+        
+        category, _, reason, label = self._keyword_rules[best_priority]
+        keyword = best_match.group(0).lower()
+        logger.warning(f"Blocked for {label}: {keyword}")
+        return {
+            "status": "blocked",
+            "reason": f"{reason}: {keyword}",
+            "categories": [category]
+        }
     
-    def _check_brand_safety(self, text: str) -> Dict[str, Any]:
-        """Check for brand safety issues"""
-        text_lower = text.lower()
-        for keyword in self.brand_safety_keywords:
-            if keyword.lower() in text_lower:
-                logger.warning(f"Blocked for brand safety: {keyword}")
-                return {
-                    "status": "blocked",
-                    "reason": f"Contains brand safety concern: {keyword}",
-                    "categories": ["brand_safety"]
-                }
-        return {"status": "safe", "reason": "", "categories": []}
+    async def _check_openai_moderation(self, text: str) -> Dict[str, Any]:
+        """Check with OpenAI Moderation API, reusing recent verdicts for identical text"""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        cached = self._moderation_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < MODERATION_CACHE_TTL_SECONDS:
+            self._moderation_cache.move_to_end(key)
+            return dict(cached[1])
+        
+        result = await self._moderate(text)
+        if result["status"] != "error":
+            self._moderation_cache[key] = (time.monotonic(), result)
+            self._moderation_cache.move_to_end(key)
+            if len(self._moderation_cache) > self._cache_size:
+                self._moderation_cache.popitem(last=False)
+        return dict(result)
     
-    def _check_inappropriate_content(self, text: str) -> Dict[str, Any]:
-        """Check for inappropriate content"""
-        text_lower = text.lower()
-        for keyword in self.inappropriate_keywords:
-            if keyword.lower() in text_lower:
-                logger.warning(f"Blocked for inappropriate content: {keyword}")
-                return {
-                    "status": "blocked",
-                    "reason": f"Contains inappropriate content: {keyword}",
-                    "categories": ["inappropriate"]
-                }
-        return {"status": "safe", "reason": "", "categories": []}
+    async def _moderate(self, text: str) -> Dict[str, Any]:
+        """Queue text for the next batched Moderation API request and wait for its verdict"""
+        if self._moderation_queue is None:
+            self._moderation_queue = asyncio.Queue()
+        if self._moderation_worker is None or self._moderation_worker.done():
+            self._moderation_worker = asyncio.create_task(self._moderation_batcher())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._moderation_queue.put((text, future))
+        return await future
     
-    def _check_openai_moderation(self, text: str) -> Dict[str, Any]:
-        """Check with OpenAI Moderation API"""
+    async def _moderation_batcher(self):
+        """Collect queued texts into batches and moderate each batch with a single API request"""
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[str, asyncio.Future]] = []
         try:
-            response = self.client.moderations.create(input=text)
-            result = response.results[0]
-            if result.flagged:
-                logger.warning(f"Flagged by OpenAI Moderation: {result.categories}")
-                return {
-                    "status": "flagged",
-                    "reason": "Flagged by OpenAI Moderation API",
-                    "categories": [k for k, v in result.categories.items() if v]
-                }
-            return {"status": "safe", "reason": "", "categories": []}
-        except Exception as e:
-            logger.error(f"OpenAI Moderation API error: {e}")
-            return {"status": "error", "reason": f"Moderation API error: {str(e)}", "categories": []} 
\ No newline at end of file
+            while True:
+                batch = [await self._moderation_queue.get()]
+                deadline = loop.time() + MODERATION_BATCH_WINDOW_SECONDS
+                while len(batch) < MODERATION_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._moderation_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                
+                try:
+                    response = await openai_request(self.client.moderations.create, input=[text for text, _ in batch])
+                    verdicts = [self._moderation_verdict(result) for result in response.results]
+                except Exception as e:
+                    logger.error(f"OpenAI Moderation API error: {e}")
+                    error = {"status": "error", "reason": f"Moderation API error: {str(e)}", "categories": []}
+                    verdicts = [dict(error) for _ in batch]
+                
+                for (_, future), verdict in zip(batch, verdicts):
+                    if not future.done():
+                        future.set_result(verdict)
+                batch = []
+        finally:
+            # Never leave a caller waiting on a verdict this worker will not deliver; _moderate restarts it
+            while not self._moderation_queue.empty():
+                batch.append(self._moderation_queue.get_nowait())
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Moderation batcher stopped"))
+    
+    def _moderation_verdict(self, result) -> Dict[str, Any]:
+        """Turn one Moderation API result into a guardrails verdict"""
+        if result.flagged:
+            logger.warning(f"Flagged by OpenAI Moderation: {result.categories}")
+            return {
+                "status": "flagged",
+                "reason": "Flagged by OpenAI Moderation API",
+                "categories": [k for k, v in result.categories.items() if v]
+            }
+        return {"status": "safe", "reason": "", "categories": []}
+
+_guardrails_service: Optional[GuardrailsService] = None
+
+def get_guardrails_service() -> GuardrailsService:
+    """Process-wide GuardrailsService, so every caller shares one moderation batcher and cache"""
+    global _guardrails_service
+    if _guardrails_service is None:
+        _guardrails_service = GuardrailsService()
+    return _guardrails_service
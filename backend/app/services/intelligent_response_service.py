@@ -1,17 +1,136 @@
+import asyncio
 import logging
+import re
+import orjson
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from app.services.openai_service import OpenAIService
-from app.services.pinecone_service import PineconeService
+from app.core.tokenizer import truncate_to_tokens
+from app.services.openai_service import get_openai_service
+from app.services.pinecone_service import get_pinecone_service, deduplicate_by_similarity
 
 logger = logging.getLogger(__name__)
 
+# Analysis domains that get their own Pinecone search alongside the primary one, restricted
+# to these content types (covering both the knowledge-service and scraper taxonomies)
+DOMAIN_CONTENT_TYPES = {
+    "product": ["product", "product_specs", "pricing"],
+    "legal": ["legal"],
+    "support": ["support", "faq"],
+    "technical": ["document", "education", "educational", "product_specs"],
+}
+# Search results at least this similar to a higher-scoring one are treated as duplicates
+DEDUP_SIMILARITY_THRESHOLD = 0.95
+# Retrieved context sent with the answer prompt is capped at this many tokens
+CONTEXT_TOKEN_BUDGET = 2000
+
+# Short queries whose keywords point at exactly one intent skip the LLM analysis call
+HEURISTIC_MAX_QUERY_LENGTH = 120
+_INTENT_RULES = [
+    # (intent, domains, keywords)
+    ("application_help", ["product"], [r"apply", r"application", r"sign(?:ing)? up", r"eligib\w*", r"qualify"]),
+    ("pricing_inquiry", ["product"], [r"rates?", r"apr", r"fees?", r"costs?", r"price", r"pricing", r"interest"]),
+    ("problem_solving", ["support"], [r"problem", r"issue", r"error", r"trouble", r"not working", r"can'?t", r"cannot", r"locked"]),
+    ("general_inquiry", ["support"], [r"contact", r"phone", r"email", r"customer service", r"support"]),
+]
+_INTENT_RE = re.compile(
+    "|".join(rf"(?P<{intent}>\b(?:{'|'.join(keywords)})\b)" for intent, _, keywords in _INTENT_RULES),
+    re.IGNORECASE
+)
+_INTENT_DOMAINS = {intent: domains for intent, domains, _ in _INTENT_RULES}
+_PRODUCT_ENTITIES = {"heloc": "HELOC", "credit card": "credit card", "card": "credit card"}
+_PRODUCT_RE = re.compile(r"\b(?:heloc|credit card|card)s?\b", re.IGNORECASE)
+
+# Response types in precedence order, each matched on keyword substrings of the query
+_RESPONSE_TYPE_RULES = [
+    ("informational", ["how", "what", "when", "where", "why"]),
+    ("troubleshooting", ["problem", "issue", "error", "trouble"]),
+    ("application_guidance", ["apply", "application", "sign up", "register"]),
+    ("pricing_information", ["price", "cost", "fee", "rate"]),
+    ("support_direction", ["contact", "support", "help"]),
+]
+_RESPONSE_TYPE_PRIORITY = {response_type: i for i, (response_type, _) in enumerate(_RESPONSE_TYPE_RULES)}
+# Zero-width lookahead so keywords are found at every position, including overlapping ones
+_RESPONSE_TYPE_RE = re.compile(
+    "(?=" + "|".join(f"(?P<{response_type}>{'|'.join(map(re.escape, keywords))})" for response_type, keywords in _RESPONSE_TYPE_RULES) + ")",
+    re.IGNORECASE
+)
+
+# Follow-up suggestions per analysed intent, already combined with the general ones and capped at 3
+_GENERAL_SUGGESTIONS = (
+    "Is there anything else I can help you with today?",
+    "Would you like to learn more about Aven's services?",
+)
+_FOLLOW_UP_SUGGESTIONS = {
+    intent: (suggestions + _GENERAL_SUGGESTIONS)[:3] for intent, suggestions in {
+        "information_seeking": (
+            "Would you like to learn more about Aven's credit card features?",
+            "Are you interested in applying for an Aven credit card?",
+            "Do you have questions about our HELOC products?",
+        ),
+        "problem_solving": (
+            "Would you like me to help you contact our support team?",
+            "Do you need assistance with your account?",
+            "Would you like to schedule a call with our customer service?",
+        ),
+        "application_help": (
+            "Would you like to start the application process?",
+            "Do you have questions about eligibility requirements?",
+            "Would you like to learn about the approval process?",
+        ),
+    }.items()
+}
+
+# Static prompt text, built once; only the query, context and user context are spliced in per call
+_ANALYSIS_PROMPT_PREFIX = """Analyze this customer query about Aven (a financial technology company):
+Query: \""""
+_ANALYSIS_PROMPT_SUFFIX = """\"
+
+Provide a detailed analysis in valid JSON format with the following structure:
+{
+    "intent": "information_seeking|problem_solving|application_help|pricing_inquiry|general_inquiry",
+    "entities": ["product1", "product2"],
+    "urgency": "low|medium|high",
+    "complexity": "simple|moderate|complex",
+    "domains": ["product", "legal", "support", "technical", "general"],
+    "tone": "professional|friendly|technical|casual",
+    "follow_up_suggestions": ["suggestion1", "suggestion2"]
+}
+
+Important: Return ONLY valid JSON, no additional text.
+"""
+_ENHANCED_PROMPT_PREFIX = """You are Aven AI's customer care assistant. Aven is a financial technology company that offers:
+- Home equity-backed credit cards
+- Home Equity Lines of Credit (HELOC)
+- Financial services through Coastal Community Bank (FDIC insured)
+
+Customer Query: \""""
+_ENHANCED_PROMPT_CONTEXT = """\"
+
+Available Context Information:
+"""
+_ENHANCED_PROMPT_INSTRUCTIONS = """
+
+Instructions:
+1. Provide accurate, helpful information based on the context
+2. Be professional yet friendly
+3. If information is not available in the context, acknowledge this and suggest contacting support
+4. Include relevant details about Aven's products and services
+5. Mention FDIC insurance and banking partnerships when relevant
+6. Provide actionable next steps when appropriate
+7. Keep responses concise but comprehensive
+
+User Context: """
+_ENHANCED_PROMPT_SUFFIX = """
+
+Please provide a helpful response:
+"""
+
 class IntelligentResponseService:
     """Enhanced response service with better context understanding and response generation"""
     
     def __init__(self):
-        self.openai_service = OpenAIService()
-        self.pinecone_service = PineconeService()
+        self.openai_service = get_openai_service()
+        self.pinecone_service = get_pinecone_service()
         
     async def generate_intelligent_response(self, query: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate intelligent response with enhanced context understanding"""
@@ -57,39 +176,16 @@ class IntelligentResponseService:
     async def _analyze_query_intelligently(self, query: str) -> Dict[str, Any]:
         """Enhanced query analysis with intent classification and entity extraction"""
         
-        analysis_prompt = f"""
-        Analyze this customer query about Aven (a financial technology company):
-        Query: "{query}"
+        heuristic = self._analyze_query_heuristically(query)
+        if heuristic is not None:
+            return heuristic
         
-        Provide a detailed analysis in valid JSON format with the following structure:
-        {{
-            "intent": "information_seeking|problem_solving|application_help|pricing_inquiry|general_inquiry",
-            "entities": ["product1", "product2"],
-            "urgency": "low|medium|high",
-            "complexity": "simple|moderate|complex",
-            "domains": ["product", "legal", "support", "technical", "general"],
-            "tone": "professional|friendly|technical|casual",
-            "follow_up_suggestions": ["suggestion1", "suggestion2"]
-        }}
-        
-        Important: Return ONLY valid JSON, no additional text.
-        """
+        analysis_prompt = "".join((_ANALYSIS_PROMPT_PREFIX, query, _ANALYSIS_PROMPT_SUFFIX))
         
         try:
-            analysis_response = await self.openai_service.generate_response(analysis_prompt, "")
-            
-            # Clean the response to ensure it's valid JSON
-            analysis_response = analysis_response.strip()
-            
-            # Remove any markdown formatting if present
-            if analysis_response.startswith("```json"):
-                analysis_response = analysis_response.replace("```json", "").replace("```", "").strip()
-            elif analysis_response.startswith("```"):
-                analysis_response = analysis_response.replace("```", "").strip()
-            
-            # Parse the JSON response
-            import json
-            analysis = json.loads(analysis_response)
+            # JSON mode guarantees a bare JSON object, so no markdown stripping is needed
+            analysis_response = await self.openai_service.generate_response(analysis_prompt, "", json_mode=True)
+            analysis = orjson.loads(analysis_response)
             
             # Validate required fields
             required_fields = ["intent", "entities", "urgency", "complexity", "domains", "tone"]
@@ -111,28 +207,54 @@ class IntelligentResponseService:
                 "follow_up_suggestions": []
             }
     
+    def _analyze_query_heuristically(self, query: str) -> Optional[Dict[str, Any]]:
+        """Keyword-based analysis for short, unambiguous queries; None when the LLM should decide"""
+        if len(query) >= HEURISTIC_MAX_QUERY_LENGTH:
+            return None
+        
+        intents = {match.lastgroup for match in _INTENT_RE.finditer(query)}
+        entities = list(dict.fromkeys(
+            _PRODUCT_ENTITIES[match.group(0).lower().rstrip("s")] for match in _PRODUCT_RE.finditer(query)
+        ))
+        if not intents and entities:
+            intents = {"information_seeking"}
+        if len(intents) != 1:
+            return None
+        
+        intent = intents.pop()
+        return {
+            "intent": intent,
+            "entities": entities,
+            "urgency": "medium",
+            "complexity": "simple",
+            "domains": _INTENT_DOMAINS.get(intent, ["product"]),
+            "tone": "professional",
+            "follow_up_suggestions": []
+        }
+    
     async def _retrieve_multi_source_knowledge(self, query: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Retrieve knowledge from multiple sources based on query analysis"""
         
-        # Generate embedding for the query
-        query_embedding = await self.openai_service.generate_embeddings(query)
-        
-        # Search Pinecone with different strategies based on analysis
-        search_results = []
+        # Domain-specific searches if needed (each domain once)
+        domains = analysis.get("domains", [])
+        search_domains = [domain for domain in dict.fromkeys(domains) if domain in DOMAIN_CONTENT_TYPES]
         
-        # Primary search
-        primary_results = await self.pinecone_service.search_similar(query_embedding, top_k=5)
-        search_results.extend(primary_results)
+        # One embedding serves every search; domain searches are narrowed by content-type metadata instead
+        query_embedding = await self.openai_service.generate_embeddings(query)
         
-        # Domain-specific searches if needed
-        domains = analysis.get("domains", [])
-        for domain in domains:
-            if domain in ["product", "legal", "support", "technical"]:
-                # Add domain-specific context to query
-                domain_query = f"{query} {domain} information"
-                domain_embedding = await self.openai_service.generate_embeddings(domain_query)
-                domain_results = await self.pinecone_service.search_similar(domain_embedding, top_k=3)
-                search_results.extend(domain_results)
+        # Primary search (top 5) and domain searches (top 3 each) run concurrently
+        result_sets = await asyncio.gather(
+            self.pinecone_service.search_similar(query_embedding, top_k=5, include_values=True),
+            *(
+                self.pinecone_service.search_similar(
+                    query_embedding, top_k=3, include_values=True,
+                    metadata_filter={"content_type": {"$in": DOMAIN_CONTENT_TYPES[domain]}}
+                )
+                for domain in search_domains
+            )
+        )
+        primary_results = result_sets[0]
+        search_results = [result for results in result_sets for result in results]
         
         # Remove duplicates and sort by relevance
         unique_results = self._deduplicate_results(search_results)
@@ -145,19 +267,8 @@ class IntelligentResponseService:
         }
     
     def _deduplicate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate results based on content similarity"""
-        unique_results = []
-        seen_content = set()
-        
-        for result in results:
-            content_hash = hash(result.get("text", "")[:100])  # Hash first 100 chars
-            if content_hash not in seen_content:
-                unique_results.append(result)
-                seen_content.add(content_hash)
-        
-        # Sort by score
-        unique_results.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return unique_results
+        """Remove duplicate and near-duplicate results (cosine similarity of their vectors), sorted by score"""
+        return deduplicate_by_similarity(results, threshold=DEDUP_SIMILARITY_THRESHOLD)
     
     async def _generate_context_aware_response(self, query: str, knowledge_results: Dict[str, Any], user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate context-aware response using retrieved knowledge"""
@@ -166,9 +277,14 @@ class IntelligentResponseService:
         context_parts = []
         sources = []
         
+        remaining = CONTEXT_TOKEN_BUDGET
         for result in knowledge_results.get("primary_results", []):
+            if remaining <= 0:
+                break
             if result.get("text"):
-                context_parts.append(result["text"])
+                text, used = truncate_to_tokens(result["text"], remaining)
+                remaining -= used
+                context_parts.append(text)
                 sources.append({
                     "url": result.get("url", ""),
                     "score": result.get("score", 0),
@@ -180,8 +296,8 @@ class IntelligentResponseService:
         # Create enhanced prompt based on query analysis
         response_prompt = self._create_enhanced_prompt(query, context, user_context)
         
-        # Generate response
-        answer = await self.openai_service.generate_response(response_prompt, context)
+        # Generate response (the enhanced prompt already embeds the context, so it is not sent a second time)
+        answer = await self.openai_service.generate_response(response_prompt, "")
         
         return {
             "answer": answer,
@@ -194,30 +310,12 @@ class IntelligentResponseService:
     def _create_enhanced_prompt(self, query: str, context: str, user_context: Optional[Dict[str, Any]] = None) -> str:
         """Create an enhanced prompt for better response generation"""
         
-        base_prompt = f"""
-        You are Aven AI's customer care assistant. Aven is a financial technology company that offers:
-        - Home equity-backed credit cards
-        - Home Equity Lines of Credit (HELOC)
-        - Financial services through Coastal Community Bank (FDIC insured)
-        
-        Customer Query: "{query}"
-        
-        Available Context Information:
-        {context}
-        
-        Instructions:
-        1. Provide accurate, helpful information based on the context
-        2. Be professional yet friendly
-        3. If information is not available in the context, acknowledge this and suggest contacting support
-        4. Include relevant details about Aven's products and services
-        5. Mention FDIC insurance and banking partnerships when relevant
-        6. Provide actionable next steps when appropriate
-        7. Keep responses concise but comprehensive
-        
-        User Context: {user_context or 'No additional context provided'}
-        
-        Please provide a helpful response:
-        """
+        base_prompt = "".join((
+            _ENHANCED_PROMPT_PREFIX, query,
+            _ENHANCED_PROMPT_CONTEXT, context,
+            _ENHANCED_PROMPT_INSTRUCTIONS, str(user_context or 'No additional context provided'),
+            _ENHANCED_PROMPT_SUFFIX
+        ))
         
         return base_prompt
     
@@ -242,21 +340,18 @@ class IntelligentResponseService:
     def _determine_response_type(self, query: str, answer: str) -> str:
         """Determine the type of response generated"""
         
-        query_lower = query.lower()
-        answer_lower = answer.lower()
-        
-        if any(word in query_lower for word in ["how", "what", "when", "where", "why"]):
-            return "informational"
-        elif any(word in query_lower for word in ["problem", "issue", "error", "trouble"]):
-            return "troubleshooting"
-        elif any(word in query_lower for word in ["apply", "application", "sign up", "register"]):
-            return "application_guidance"
-        elif any(word in query_lower for word in ["price", "cost", "fee", "rate"]):
-            return "pricing_information"
-        elif any(word in query_lower for word in ["contact", "support", "help"]):
-            return "support_direction"
-        else:
+        # One scan of the query; the highest-precedence matching type wins
+        best = None
+        for match in _RESPONSE_TYPE_RE.finditer(query):
+            priority = _RESPONSE_TYPE_PRIORITY[match.lastgroup]
+            if best is None or priority < best:
+                best = priority
+                if priority == 0:
+                    break
+        
+        if best is None:
             return "general_information"
+        return _RESPONSE_TYPE_RULES[best][0]
     
     async def _enhance_response_quality(self, response: Dict[str, Any], query_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Enhance response quality with additional features"""
@@ -264,7 +359,7 @@ class IntelligentResponseService:
         enhanced_response = response.copy()
         
         # Add response suggestions based on query analysis
-        suggestions = await self._generate_follow_up_suggestions(query_analysis, response)
+        suggestions = self._generate_follow_up_suggestions(query_analysis, response)
         enhanced_response["suggestions"] = suggestions
         
         # Add confidence indicators
@@ -278,42 +373,10 @@ class IntelligentResponseService:
         
         return enhanced_response
     
-    async def _generate_follow_up_suggestions(self, query_analysis: Dict[str, Any], response: Dict[str, Any]) -> List[str]:
+    def _generate_follow_up_suggestions(self, query_analysis: Dict[str, Any], response: Dict[str, Any]) -> List[str]:
         """Generate follow-up question suggestions"""
-        
         intent = query_analysis.get("intent", "information_seeking")
-        response_type = response.get("response_type", "general_information")
-        
-        suggestions = []
-        
-        if intent == "information_seeking":
-            suggestions.extend([
-                "Would you like to learn more about Aven's credit card features?",
-                "Are you interested in applying for an Aven credit card?",
-                "Do you have questions about our HELOC products?"
-            ])
-        
-        elif intent == "problem_solving":
-            suggestions.extend([
-                "Would you like me to help you contact our support team?",
-                "Do you need assistance with your account?",
-                "Would you like to schedule a call with our customer service?"
-            ])
-        
-        elif intent == "application_help":
-            suggestions.extend([
-                "Would you like to start the application process?",
-                "Do you have questions about eligibility requirements?",
-                "Would you like to learn about the approval process?"
-            ])
-        
-        # Add general suggestions
-        suggestions.extend([
-            "Is there anything else I can help you with today?",
-            "Would you like to learn more about Aven's services?"
-        ])
-        
-        return suggestions[:3]  # Limit to top 3 suggestions
+        return list(_FOLLOW_UP_SUGGESTIONS.get(intent, _GENERAL_SUGGESTIONS))
     
     async def generate_conversational_response(self, query: str, conversation_history: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate response considering conversation history"""
@@ -1,8 +1,14 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
+import asyncio
 import logging
 import os
-from typing import Optional
-from app.services.cache_service import CacheService
+import random
+from typing import Any, Dict, List, Optional
+from app.core.http_client import get_async_http_client
+from app.core.rate_limiter import AsyncTokenBucket
+from app.core.tokenizer import truncate_to_tokens
+from app.services.cache_service import get_cache_service
+from app.services.semantic_cache import SemanticResponseCache
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -10,6 +16,58 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Process-wide throttles shared by every OpenAIService instance
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+_request_limiter = AsyncTokenBucket(OPENAI_REQUESTS_PER_MINUTE, 60)
+_request_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+# Answers reused for near-identical questions asked against the same retrieved context
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+
+_semantic_cache = SemanticResponseCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_SECONDS)
+
+# text-embedding-3-small rejects inputs over 8191 tokens; without tiktoken, truncate at a
+# conservative 3 characters per token so the cap still holds for dense text
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_MAX_TOKENS = 8191
+EMBEDDING_FALLBACK_CHARS_PER_TOKEN = 3
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying, honouring the retry-after header when present"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+    # Exponential backoff with jitter: 1s, 2s, 4s ... capped at 30s
+    return min(30.0, 2 ** attempt) + random.uniform(0, 1)
+
+async def openai_request(func, **kwargs):
+    """Await an OpenAI SDK call under the shared rate limiter and concurrency cap, retrying transient errors"""
+    attempt = 0
+    while True:
+        await _request_limiter.acquire()
+        try:
+            async with _request_semaphore:
+                return await func(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt >= OPENAI_MAX_RETRIES:
+                raise
+            delay = _retry_delay(e, attempt)
+            attempt += 1
+            logger.warning(f"OpenAI request failed ({type(e).__name__}), retrying in {delay:.1f}s (attempt {attempt}/{OPENAI_MAX_RETRIES})")
+            await asyncio.sleep(delay)
+
 class OpenAIService:
     def __init__(self):
         # Get API key from environment
@@ -18,42 +76,68 @@ class OpenAIService:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
         try:
-            self.client = OpenAI(api_key=api_key)
-            self.cache_service = CacheService()
+            # Retries are handled by _request so they respect the shared throttle
+            self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=get_async_http_client())
+            self.cache_service = get_cache_service()
             logger.info("OpenAI client initialized successfully with caching")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI client: {e}")
             raise
     
-    async def generate_response(self, message: str, context: str = "") -> str:
-        """Generate a response using OpenAI's GPT model"""
+    async def _request(self, func, **kwargs):
+        """Await an OpenAI SDK call under the shared rate limiter and concurrency cap"""
+        return await openai_request(func, **kwargs)
+    
+    def _chat_request(self, message: str, context: str, json_mode: bool = False) -> Dict[str, Any]:
+        """Chat completion arguments for a support answer to `message` grounded in `context`"""
+        prompt = f"""
+        You are a helpful customer support agent for Aven, a financial technology company.
+        
+        Contact Information:
+        - Email: support@aven.com
+        - Support Website: https://www.aven.com/support
+        
+        Context: {context}
+        
+        User question: {message}
+        
+        Please provide a helpful, accurate response based on the context provided.
+        If you don't have enough information, say so politely and provide the correct contact information.
+        """
+        
+        request = {
+            "model": "gpt-4o-mini",  # Using more cost-effective model
+            "messages": [
+                {"role": "system", "content": "You are a helpful customer support agent for Aven. Contact: support@aven.com, Support: https://www.aven.com/support"},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 500,
+            "temperature": 0.7
+        }
+        if json_mode:
+            # The model is constrained to emit a single valid JSON object
+            request["response_format"] = {"type": "json_object"}
+        return request
+    
+    async def generate_response(self, message: str, context: str = "", message_embedding: Optional[List[float]] = None,
+                                json_mode: bool = False) -> str:
+        """Generate a response using OpenAI's GPT model (pass the question's embedding to enable the semantic cache)"""
         try:
-            prompt = f"""
-            You are a helpful customer support agent for Aven, a financial technology company.
-            
-            Contact Information:
-            - Email: support@aven.com
-            - Support Website: https://www.aven.com/support
+            if message_embedding is not None:
+                cached_answer = _semantic_cache.get(message_embedding, context)
+                if cached_answer is not None:
+                    return cached_answer
             
-            Context: {context}
-            
-            User question: {message}
-            
-            Please provide a helpful, accurate response based on the context provided.
-            If you don't have enough information, say so politely and provide the correct contact information.
-            """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Using more cost-effective model
-                messages=[
-                    {"role": "system", "content": "You are a helpful customer support agent for Aven. Contact: support@aven.com, Support: https://www.aven.com/support"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
+            response = await self._request(
+                self.client.chat.completions.create,
+                **self._chat_request(message, context, json_mode)
             )
             
-            return response.choices[0].message.content.strip()
+            answer = response.choices[0].message.content.strip()
+            if message_embedding is not None:
+                _semantic_cache.put(message_embedding, context, answer)
+            
+            return answer
         
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
@@ -69,9 +153,10 @@ class OpenAIService:
                 return cached_embedding
             
             # Generate new embedding
-            response = self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
+            response = await self._request(
+                self.client.embeddings.create,
+                model=EMBEDDING_MODEL,
+                input=_embedding_input(text)
             )
             embedding = response.data[0].embedding
             
@@ -82,4 +167,59 @@ class OpenAIService:
         
         except Exception as e:
             logger.error(f"OpenAI embeddings error: {str(e)}")
-            raise Exception(f"Failed to generate embeddings: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to generate embeddings: {str(e)}")
+    
+    async def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[list]]:
+        """Generate embeddings for several texts in one API request, reusing cached embeddings.
+
+        Blank texts, and texts the API rejects on their own, get None instead of failing the whole batch.
+        """
+        try:
+            embeddings = await asyncio.gather(*(self.cache_service.get_cached_embedding(text) for text in texts))
+            missing = [i for i, embedding in enumerate(embeddings) if not embedding and texts[i].strip()]
+            
+            if missing:
+                try:
+                    response = await self._request(
+                        self.client.embeddings.create,
+                        model=EMBEDDING_MODEL,
+                        input=[_embedding_input(texts[i]) for i in missing]
+                    )
+                    for data in response.data:
+                        embeddings[missing[data.index]] = data.embedding
+                except Exception as e:
+                    # One bad input fails the whole request; retry item by item so only that input is lost
+                    logger.warning(f"Batch embedding of {len(missing)} texts failed, retrying individually: {e}")
+                    results = await asyncio.gather(*(self._embed_one(texts[i]) for i in missing))
+                    for i, embedding in zip(missing, results):
+                        embeddings[i] = embedding
+                
+                await asyncio.gather(*(self.cache_service.cache_embedding(texts[i], embeddings[i]) for i in missing if embeddings[i]))
+            
+            return [embedding or None for embedding in embeddings]
+        
+        except Exception as e:
+            logger.error(f"OpenAI batch embeddings error: {str(e)}")
+            raise Exception(f"Failed to generate embeddings: {str(e)}")
+    
+    async def _embed_one(self, text: str) -> Optional[list]:
+        """Embed a single text for the batch fallback, returning None if the API rejects it"""
+        try:
+            response = await self._request(self.client.embeddings.create, model=EMBEDDING_MODEL, input=_embedding_input(text))
+            return response.data[0].embedding
+        except Exception as e:
+            logger.error(f"Failed to embed text ({text[:50]}...): {e}")
+            return None
+
+def _embedding_input(text: str) -> str:
+    """Cap text at the embedding model's input limit"""
+    return truncate_to_tokens(text, EMBEDDING_MAX_TOKENS, EMBEDDING_FALLBACK_CHARS_PER_TOKEN)[0]
+
+_openai_service: Optional[OpenAIService] = None
+
+def get_openai_service() -> OpenAIService:
+    """Process-wide OpenAIService, so every caller shares one client and one cache"""
+    global _openai_service
+    if _openai_service is None:
+        _openai_service = OpenAIService()
+    return _openai_service
@@ -1,6 +1,13 @@
+import asyncio
+import hashlib
+import heapq
 import logging
 import os
-from typing import List, Dict, Any
+import threading
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+import numpy as np
+import orjson
 from pinecone import Pinecone
 
 # Load environment variables
@@ -9,6 +16,101 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Shared across PineconeService instances so the underlying connection pool is reused
+_pinecone_client = None
+_index_handles: Dict[str, Any] = {}
+# Serializes index creation/connection across threads and service instances
+_index_lock = threading.Lock()
+
+# Blocking SDK calls made from async methods run in worker threads, at most this many at once
+PINECONE_MAX_CONCURRENCY = int(os.getenv("PINECONE_MAX_CONCURRENCY", "10"))
+_pinecone_semaphore = asyncio.Semaphore(PINECONE_MAX_CONCURRENCY)
+# Upsert requests hold at most PINECONE_UPSERT_BATCH_SIZE vectors and roughly PINECONE_UPSERT_MAX_BYTES
+# of estimated JSON payload, whichever limit is hit first: Pinecone rejects requests over 2MB, and a
+# 1536-dim vector with a full 40KB text field serializes to ~70KB, so large pages fill a request long
+# before the count limit. Beyond a few concurrent requests, client-side serialization becomes the
+# bottleneck and returns diminish; app/scripts/tune_pinecone_upserts.py sweeps count and concurrency.
+PINECONE_UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+PINECONE_UPSERT_MAX_BYTES = int(os.getenv("PINECONE_UPSERT_MAX_BYTES", str(1_800_000)))
+PINECONE_UPSERT_CONCURRENCY = int(os.getenv("PINECONE_UPSERT_CONCURRENCY", "4"))
+# Upper bound on the JSON size of one float in "values", plus per-vector envelope overhead
+_BYTES_PER_VALUE = 24
+_VECTOR_OVERHEAD_BYTES = 128
+
+def _get_pinecone_client(api_key: str) -> Pinecone:
+    global _pinecone_client
+    if _pinecone_client is None:
+        _pinecone_client = Pinecone(api_key=api_key)
+    return _pinecone_client
+
+def _score(result: Dict[str, Any]) -> float:
+    return result.get("score", 0)
+
+def deduplicate_by_similarity(results: List[Dict[str, Any]], threshold: float = 0.95, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Drop results whose vector is at least `threshold` cosine-similar to a higher-scoring kept result.
+
+    Similarities come from one normalised Gram matrix; results without "values" fall back to
+    exact matching on a digest of their full text. The survivors (at most `top_k`) are returned sorted by score.
+    """
+    results = sorted(results, key=_score, reverse=True)
+    scored = [r for r in results if r.get("values")]
+    unscored = [r for r in results if not r.get("values")]
+    
+    kept = []
+    if scored:
+        matrix = np.asarray([r["values"] for r in scored], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        similarities = matrix @ matrix.T
+        
+        kept_idx = []
+        for i in range(len(scored)):
+            if not kept_idx or similarities[i, kept_idx].max() < threshold:
+                kept_idx.append(i)
+        kept = [scored[i] for i in kept_idx]
+    
+    kept_unscored = []
+    seen_content = set()
+    for result in unscored:
+        content_key = hashlib.blake2b(result.get("text", "").encode("utf-8"), digest_size=8).digest()
+        if content_key not in seen_content:
+            seen_content.add(content_key)
+            kept_unscored.append(result)
+    
+    # Both lists are already in score order, so a lazy merge replaces a second sort
+    return list(islice(heapq.merge(kept, kept_unscored, key=_score, reverse=True), top_k))
+
+def _to_vector(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": doc["id"],
+        "values": doc["embedding"],
+        "metadata": {
+            "text": doc["text"][:40000],  # Limit metadata size
+            "source": doc.get("source", ""),
+            "url": doc.get("url", ""),
+            "content_type": doc.get("content_type", ""),
+            "timestamp": doc.get("timestamp", "")
+        }
+    }
+
+def _estimated_size(vector: Dict[str, Any]) -> int:
+    return (_BYTES_PER_VALUE * len(vector["values"]) + len(orjson.dumps(vector.get("metadata", {})))
+            + len(vector["id"]) + _VECTOR_OVERHEAD_BYTES)
+
+def _request_batches(vectors: Iterable[Dict[str, Any]], batch_size: int, max_bytes: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group vectors into request batches bounded by count and estimated payload size"""
+    batch: List[Dict[str, Any]] = []
+    batch_bytes = 0
+    for vector in vectors:
+        size = _estimated_size(vector)
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(vector)
+        batch_bytes += size
+    if batch:
+        yield batch
+
 class PineconeService:
     def __init__(self):
         # Get API key from environment
@@ -17,16 +119,30 @@ class PineconeService:
             raise ValueError("PINECONE_API_KEY environment variable is not set")
         
         try:
-            self.pc = Pinecone(api_key=api_key)
+            self.pc = _get_pinecone_client(api_key)
             self.index_name = "aven-knowledge"
             self.index = None
             logger.info("Pinecone client initialized successfully")
+            # Connect once up front (a cached handle after the first instance) so methods never lazily initialize
+            self.initialize_index()
         except Exception as e:
             logger.error(f"Failed to initialize Pinecone client: {e}")
             raise
     
     def initialize_index(self):
         """Initialize or create Pinecone index"""
+        if self.index_name in _index_handles:
+            self.index = _index_handles[self.index_name]
+            return True
+        
+        with _index_lock:
+            if self.index_name in _index_handles:
+                self.index = _index_handles[self.index_name]
+                return True
+            return self._connect_index()
+    
+    def _connect_index(self):
+        """Create the index if it is missing and open a handle to it (caller holds _index_lock)"""
         try:
             # Check if index exists
             existing_indexes = [index.name for index in self.pc.list_indexes()]
@@ -41,6 +157,7 @@ class PineconeService:
                 logger.info(f"Created Pinecone index: {self.index_name}")
             
             self.index = self.pc.Index(self.index_name)
+            _index_handles[self.index_name] = self.index
             logger.info(f"Connected to Pinecone index: {self.index_name}")
             return True
             
@@ -48,45 +165,65 @@ class PineconeService:
             logger.error(f"Pinecone initialization error: {str(e)}")
             raise Exception(f"Failed to initialize Pinecone: {str(e)}")
     
-    async def upsert_documents(self, documents: List[Dict[str, Any]]):
-        """Upsert documents into Pinecone"""
-        if not self.index:
-            self.initialize_index()
-            
+    async def _run(self, func, **kwargs):
+        """Run a blocking Pinecone SDK call in a worker thread under the shared concurrency cap"""
+        async with _pinecone_semaphore:
+            return await asyncio.to_thread(func, **kwargs)
+    
+    async def _upsert_batches(self, vectors: Iterable[Dict[str, Any]], batch_size: int,
+                              concurrency: int = PINECONE_UPSERT_CONCURRENCY, namespace: Optional[str] = None) -> int:
+        """Send vectors in batches of at most `batch_size` vectors and PINECONE_UPSERT_MAX_BYTES,
+        `concurrency` requests at a time, and return how many were upserted.
+
+        Workers pull the next batch from the shared iterator only when they are free, so a generator
+        input is consumed lazily and at most `concurrency` batches are held in memory.
+        """
+        extra = {"namespace": namespace} if namespace else {}
+        batches = _request_batches(vectors, batch_size, PINECONE_UPSERT_MAX_BYTES)
+        sent = 0
+        
+        async def worker():
+            nonlocal sent
+            while batch := next(batches, None):
+                await self._run(self.index.upsert, vectors=batch, **extra)
+                sent += len(batch)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
         try:
-            vectors = []
-            for doc in documents:
-                vectors.append({
-                    "id": doc["id"],
-                    "values": doc["embedding"],
-                    "metadata": {
-                        "text": doc["text"][:40000],  # Limit metadata size
-                        "source": doc.get("source", ""),
-                        "url": doc.get("url", ""),
-                        "timestamp": doc.get("timestamp", "")
-                    }
-                })
-            
-            self.index.upsert(vectors=vectors)
-            logger.info(f"Upserted {len(vectors)} documents to Pinecone")
+            await asyncio.gather(*workers)
+        except BaseException:
+            # Stop the other workers pulling further batches before surfacing the first failure
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.error(f"Upsert aborted after {sent} vectors were written")
+            raise
+        return sent
+    
+    async def upsert_documents(self, documents: Iterable[Dict[str, Any]], batch_size: int = PINECONE_UPSERT_BATCH_SIZE):
+        """Upsert documents into Pinecone, sending `batch_size` vectors per request"""
+        try:
+            count = await self._upsert_batches((_to_vector(doc) for doc in documents), batch_size)
+            logger.info(f"Upserted {count} documents to Pinecone")
             
         except Exception as e:
             logger.error(f"Pinecone upsert error: {str(e)}")
             raise Exception(f"Failed to upsert documents: {str(e)}")
     
-    async def search_similar(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
-        """Search for similar documents"""
-        if not self.index:
-            self.initialize_index()
-            
+    async def search_similar(self, query_embedding: List[float], top_k: int = 5, include_values: bool = False,
+                             metadata_filter: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Search for similar documents, optionally restricted by a Pinecone metadata filter"""
         try:
-            results = self.index.query(
+            results = await self._run(
+                self.index.query,
                 vector=query_embedding,
                 top_k=top_k,
-                include_metadata=True
+                include_metadata=True,
+                include_values=include_values,
+                filter=metadata_filter
             )
             
-            logger.info(f"Pinecone search results: {results}")
+            logger.info(f"Pinecone search returned {len(results.get('matches', []))} matches")
             
             processed_results = []
             for match in results.get("matches", []):
@@ -100,6 +237,8 @@ class PineconeService:
                         "url": metadata.get("url", ""),
                         "timestamp": metadata.get("timestamp", "")
                     }
+                    if include_values:
+                        processed_result["values"] = match.get("values", [])
                     processed_results.append(processed_result)
                 except Exception as e:
                     logger.warning(f"Error processing search result: {e}")
@@ -115,14 +254,12 @@ class PineconeService:
         """Search for similar vectors"""
         return await self.search_similar(query_embedding, top_k)
     
-    async def upsert_vectors(self, vectors: List[Dict[str, Any]]):
-        """Upsert vectors into Pinecone"""
-        if not self.index:
-            self.initialize_index()
-            
+    async def upsert_vectors(self, vectors: Iterable[Dict[str, Any]], batch_size: int = PINECONE_UPSERT_BATCH_SIZE,
+                             concurrency: int = PINECONE_UPSERT_CONCURRENCY, namespace: Optional[str] = None):
+        """Upsert vectors into Pinecone, sending `batch_size` vectors per request"""
         try:
-            self.index.upsert(vectors=vectors)
-            logger.info(f"Upserted {len(vectors)} vectors to Pinecone")
+            count = await self._upsert_batches(vectors, batch_size, concurrency, namespace)
+            logger.info(f"Upserted {count} vectors to Pinecone")
             
         except Exception as e:
             logger.error(f"Pinecone upsert error: {str(e)}")
@@ -130,9 +267,6 @@ class PineconeService:
     
     def get_index_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
-        if not self.index:
-            self.initialize_index()
-            
         try:
             stats = self.index.describe_index_stats()
             return {
@@ -147,9 +281,6 @@ class PineconeService:
     
     def delete_vectors(self, ids: List[str]):
         """Delete vectors by IDs"""
-        if not self.index:
-            self.initialize_index()
-            
         try:
             self.index.delete(ids=ids)
             logger.info(f"Deleted {len(ids)} vectors from Pinecone")
@@ -159,9 +290,6 @@ class PineconeService:
     
     def clear_index(self):
         """Clear all vectors from the index"""
-        if not self.index:
-            self.initialize_index()
-            
         try:
             # Get all vector IDs and delete them
             stats = self.index.describe_index_stats()
@@ -174,3 +302,12 @@ class PineconeService:
         except Exception as e:
             logger.error(f"Failed to clear index: {e}")
             raise Exception(f"Failed to clear index: {str(e)}")
+
+_pinecone_service: Optional[PineconeService] = None
+
+def get_pinecone_service() -> PineconeService:
+    """Process-wide PineconeService sharing the connected index handle"""
+    global _pinecone_service
+    if _pinecone_service is None:
+        _pinecone_service = PineconeService()
+    return _pinecone_service
@@ -1,17 +1,75 @@
+import functools
 import re
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Any
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    SPACY_AVAILABLE = True
-except Exception as e:
-    logger.warning("spaCy not available or en_core_web_sm not installed. Only keyword/entity extraction will be used.")
-    SPACY_AVAILABLE = False
+# spaCy (and its model) is loaded on first use; only meeting/action queries need DATE/TIME entities
+_nlp = None
+_nlp_unavailable = False
+_nlp_lock = threading.Lock()
+
+def _get_nlp():
+    """Load en_core_web_sm once, returning None if spaCy or the model is not installed"""
+    global _nlp, _nlp_unavailable
+    if _nlp is not None or _nlp_unavailable:
+        return _nlp
+    with _nlp_lock:
+        if _nlp is None and not _nlp_unavailable:
+            try:
+                import spacy
+                _nlp = spacy.load("en_core_web_sm")
+            except Exception:
+                logger.warning("spaCy not available or en_core_web_sm not installed. Only keyword/entity extraction will be used.")
+                _nlp_unavailable = True
+    return _nlp
+
+@functools.lru_cache(maxsize=2048)
+def _nlp_entities_cached(query: str) -> Tuple[Tuple[str, str], ...]:
+    """spaCy entities for a query; cached on the raw text since parsing dominates analysis cost"""
+    nlp = _get_nlp()
+    if nlp is None:
+        return ()
+    return tuple((ent.text, ent.label_) for ent in nlp(query).ents)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TIME_RE = re.compile(r"today|tomorrow|this week|next week|this month|next month|\d{1,2}:\d{2}|\d{1,2}[ap]m")
+_INTENT_WORDS = [
+    ("information_seeking", ["what", "how", "when", "where", "why"]),
+    ("support_request", ["help", "support", "issue", "problem"]),
+    ("action_request", ["schedule", "book", "meeting"]),
+    ("comparison", ["compare", "vs", "difference"]),
+]
+_INTENT_RES = [(intent, re.compile("|".join(map(re.escape, words)))) for intent, words in _INTENT_WORDS]
+
+class _KeywordMatcher:
+    """Substring matching of a keyword list with one precompiled regex scan"""
+    
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        # Longest-first lookahead alternation reports the longest keyword starting at each position;
+        # every shorter keyword starting there is a prefix of it, so counts match per-keyword `in` checks
+        ordered = sorted(set(keywords), key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+        self._prefixes = {k: {p for p in ordered if k.startswith(p)} for k in ordered}
+    
+    def search(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+    
+    def count(self, text: str) -> int:
+        """Number of distinct keywords contained in text"""
+        found = set()
+        for match in self._pattern.finditer(text):
+            found |= self._prefixes[match.group(1)]
+        return len(found)
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (casefold + collapsed whitespace)"""
+    return _WHITESPACE_RE.sub(" ", query.casefold()).strip()
 
 class QueryType(str, Enum):
     GENERAL = "general"
@@ -24,7 +82,14 @@ class QueryType(str, Enum):
 class QueryAnalyzer:
     """Analyzes and classifies user queries, with NLP entity extraction and calendar trigger."""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096, eager_spacy: bool = False):
+        # By default spaCy only runs for queries that could trigger the calendar
+        self.eager_spacy = eager_spacy
+        if eager_spacy:
+            _get_nlp()
+        # LRU of analysis results keyed on the normalized query
+        self._analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_size = cache_size
         # Keywords for real-time search
         self.realtime_keywords = [
             "latest", "current", "recent", "new", "updated", "now", "today",
@@ -51,45 +116,64 @@ class QueryAnalyzer:
             "schedule", "book", "meeting", "appointment", "call", "demo",
             "consultation", "talk", "discuss", "set up"
         ]
+        self._realtime_matcher = _KeywordMatcher(self.realtime_keywords)
+        self._pricing_matcher = _KeywordMatcher(self.pricing_keywords)
+        self._feature_matcher = _KeywordMatcher(self.feature_keywords)
+        self._support_matcher = _KeywordMatcher(self.support_keywords)
+        self._meeting_matcher = _KeywordMatcher(self.meeting_keywords)
     
     def analyze_query(self, query: str) -> Dict[str, Any]:
         """Analyze a query and return classification, NLP entities, and calendar trigger."""
-        query_lower = query.lower().strip()
-        # Determine query type
-        query_type = self._classify_query(query_lower)
-        # Extract entities and intent
-        entities = self._extract_entities(query_lower)
-        nlp_entities = self._extract_nlp_entities(query) if SPACY_AVAILABLE else []
-        intent = self._determine_intent(query_lower)
-        # Calculate confidence
-        confidence = self._calculate_confidence(query_lower, query_type)
+        # Keyword analysis runs on the normalized query, so it is cached under that same key;
+        # spaCy needs the original casing and is memoized separately on the raw text
+        key = normalize_query(query)
+        analysis = self._analysis_cache.get(key)
+        if analysis is not None:
+            self._analysis_cache.move_to_end(key)
+        else:
+            analysis = self._analyze(key)
+            self._analysis_cache[key] = analysis
+            if len(self._analysis_cache) > self._cache_size:
+                self._analysis_cache.popitem(last=False)
+        analysis = dict(analysis)
+        # NLP entities only feed the calendar trigger, so skip the spaCy parse for everything else
+        needs_nlp = self.eager_spacy or analysis["intent"] == "action_request" or analysis["query_type"] == QueryType.MEETING
+        nlp_entities = self._extract_nlp_entities(query.strip()) if needs_nlp else []
+        analysis["nlp_entities"] = nlp_entities
         # Calendar trigger logic
-        calendar_trigger = (
-            intent == "action_request" and (
-                any(e in entities for e in ["meeting", "appointment", "call", "demo"]) or
+        analysis["calendar_trigger"] = (
+            analysis["intent"] == "action_request" and (
+                any(e in analysis["entities"] for e in ["meeting", "appointment", "call", "demo"]) or
                 any(ent[1] in ["DATE", "TIME"] for ent in nlp_entities)
             )
         )
+        return analysis
+    def _analyze(self, normalized_query: str) -> Dict[str, Any]:
+        # Determine query type
+        query_type = self._classify_query(normalized_query)
+        # Extract entities and intent
+        entities = self._extract_entities(normalized_query)
+        intent = self._determine_intent(normalized_query)
+        # Calculate confidence
+        confidence = self._calculate_confidence(normalized_query, query_type)
         return {
             "query_type": query_type,
             "entities": entities,
-            "nlp_entities": nlp_entities,
             "intent": intent,
             "confidence": confidence,
             "requires_realtime": query_type == QueryType.REALTIME,
-            "requires_tools": query_type == QueryType.MEETING,
-            "calendar_trigger": calendar_trigger
+            "requires_tools": query_type == QueryType.MEETING
         }
     def _classify_query(self, query: str) -> QueryType:
-        if any(keyword in query for keyword in self.realtime_keywords):
+        if self._realtime_matcher.search(query):
             return QueryType.REALTIME
-        elif any(keyword in query for keyword in self.meeting_keywords):
+        elif self._meeting_matcher.search(query):
             return QueryType.MEETING
-        elif any(keyword in query for keyword in self.pricing_keywords):
+        elif self._pricing_matcher.search(query):
             return QueryType.PRICING
-        elif any(keyword in query for keyword in self.feature_keywords):
+        elif self._feature_matcher.search(query):
             return QueryType.FEATURES
-        elif any(keyword in query for keyword in self.support_keywords):
+        elif self._support_matcher.search(query):
             return QueryType.SUPPORT
         else:
             return QueryType.GENERAL
@@ -101,38 +185,25 @@ class QueryAnalyzer:
             entities.append("credit_card")
         if "home equity" in query or "heloc" in query:
             entities.append("home_equity")
-        time_patterns = [
-            r"today", r"tomorrow", r"this week", r"next week",
-            r"this month", r"next month", r"\d{1,2}:\d{2}", r"\d{1,2}am", r"\d{1,2}pm"
-        ]
-        for pattern in time_patterns:
-            matches = re.findall(pattern, query)
-            entities.extend(matches)
+        entities.extend(_TIME_RE.findall(query))
         return list(set(entities))
     def _extract_nlp_entities(self, query: str) -> List[Tuple[str, str]]:
-        doc = nlp(query)
-        return [(ent.text, ent.label_) for ent in doc.ents]
+        return list(_nlp_entities_cached(query))
     def _determine_intent(self, query: str) -> str:
-        if any(word in query for word in ["what", "how", "when", "where", "why"]):
-            return "information_seeking"
-        elif any(word in query for word in ["help", "support", "issue", "problem"]):
-            return "support_request"
-        elif any(word in query for word in ["schedule", "book", "meeting"]):
-            return "action_request"
-        elif any(word in query for word in ["compare", "vs", "difference"]):
-            return "comparison"
-        else:
-            return "general_inquiry"
+        for intent, pattern in _INTENT_RES:
+            if pattern.search(query):
+                return intent
+        return "general_inquiry"
     def _calculate_confidence(self, query: str, query_type: QueryType) -> float:
         base_confidence = 0.5
         if query_type == QueryType.REALTIME:
-            matches = sum(1 for keyword in self.realtime_keywords if keyword in query)
+            matches = self._realtime_matcher.count(query)
             base_confidence += min(matches * 0.2, 0.4)
         elif query_type == QueryType.MEETING:
-            matches = sum(1 for keyword in self.meeting_keywords if keyword in query)
+            matches = self._meeting_matcher.count(query)
             base_confidence += min(matches * 0.2, 0.4)
         elif query_type == QueryType.PRICING:
-            matches = sum(1 for keyword in self.pricing_keywords if keyword in query)
+            matches = self._pricing_matcher.count(query)
             base_confidence += min(matches * 0.2, 0.4)
         if "aven" in query:
             base_confidence += 0.1
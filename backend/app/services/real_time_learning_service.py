@@ -1,20 +1,55 @@
+import functools
+import hashlib
 import logging
 import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
-from app.services.openai_service import OpenAIService
-from app.services.pinecone_service import PineconeService
+from collections import defaultdict, deque
+from app.services.openai_service import get_openai_service
+from app.services.pinecone_service import get_pinecone_service
 
 logger = logging.getLogger(__name__)
 
+_QUERY_PATTERNS = [
+    ("pricing", "pricing_inquiry"),
+    ("apply", "application_inquiry"),
+    ("problem", "troubleshooting"),
+    ("contact", "support_request"),
+    ("feature", "product_inquiry"),
+    ("fee", "pricing_inquiry"),
+    ("rate", "pricing_inquiry"),
+    ("limit", "product_inquiry"),
+    ("approval", "application_inquiry"),
+    ("eligibility", "application_inquiry")
+]
+
+# Interactions kept in memory, and how many of the most recent ones the learning report covers
+INTERACTION_LOG_SIZE = 1000
+REPORT_WINDOW = 100
+
+@functools.lru_cache(maxsize=4096)
+def _extract_query_pattern(query: str) -> Optional[str]:
+    """Extract common patterns from queries (cached: reports rescan the same logged queries)"""
+    query_lower = query.lower()
+    for keyword, pattern in _QUERY_PATTERNS:
+        if keyword in query_lower:
+            return pattern
+    return None
+
 class RealTimeLearningService:
     """Service for real-time learning and knowledge base improvement"""
     
     def __init__(self):
-        self.openai_service = OpenAIService()
-        self.pinecone_service = PineconeService()
-        self.interaction_log = []
+        self.openai_service = get_openai_service()
+        self.pinecone_service = get_pinecone_service()
+        self.interaction_log = deque(maxlen=INTERACTION_LOG_SIZE)
+        # Running aggregates over the last REPORT_WINDOW interactions, so reports never rescan the log
+        self._window = deque()
+        self._confidence_sum = 0.0
+        self._low_conf_count = 0
+        self._negative_count = 0
+        self._missing_info_count = 0
+        self._pattern_counts: Dict[str, int] = defaultdict(int)
         self.knowledge_gaps = []
         self.improvement_suggestions = []
         
@@ -33,14 +68,50 @@ class RealTimeLearningService:
             "user_satisfaction": interaction_data.get("satisfaction", None)
         }
         
+        # The deque drops the oldest entry once INTERACTION_LOG_SIZE is reached
         self.interaction_log.append(interaction)
+        self._update_report_window(interaction)
         
         # Analyze interaction for learning opportunities
         await self._analyze_interaction_for_learning(interaction)
-        
-        # Keep only recent interactions (last 1000)
-        if len(self.interaction_log) > 1000:
-            self.interaction_log = self.interaction_log[-1000:]
+    
+    def _update_report_window(self, interaction: Dict[str, Any]):
+        """Add an interaction to the report aggregates, retiring the one that falls out of the window"""
+        
+        confidence = interaction.get("confidence") or 0.0
+        stats = (
+            interaction["timestamp"],
+            confidence,
+            confidence < 0.4,
+            (interaction.get("user_feedback") or {}).get("rating") in [1, 2],
+            "don't have" in interaction.get("response", "").lower(),
+            _extract_query_pattern(interaction.get("query", ""))
+        )
+        self._apply_window_stats(stats, 1)
+        self._window.append(stats)
+        
+        if len(self._window) > REPORT_WINDOW:
+            self._apply_window_stats(self._window.popleft(), -1)
+    
+    def _apply_window_stats(self, stats: tuple, sign: int):
+        _, confidence, low_confidence, negative, missing_info, pattern = stats
+        self._confidence_sum += sign * confidence
+        self._low_conf_count += sign * low_confidence
+        self._negative_count += sign * negative
+        self._missing_info_count += sign * missing_info
+        if pattern:
+            self._pattern_counts[pattern] += sign
+            if not self._pattern_counts[pattern]:
+                del self._pattern_counts[pattern]
+    
+    async def log_interactions_bulk(self, interactions: List[Dict[str, Any]]):
+        """Log a batch of user interactions"""
+        
+        for interaction_data in interactions:
+            try:
+                await self.log_interaction(interaction_data)
+            except Exception as e:
+                logger.warning(f"Failed to log interaction: {e}")
     
     async def _analyze_interaction_for_learning(self, interaction: Dict[str, Any]):
         """Analyze interaction to identify learning opportunities"""
@@ -193,35 +264,11 @@ class RealTimeLearningService:
         
         # This could be expanded to track query patterns and optimize responses
         # For now, just log the pattern
-        pattern = self._extract_query_pattern(query)
+        pattern = _extract_query_pattern(query)
         
         if pattern:
             logger.info(f"Common query pattern identified: {pattern}")
     
-    def _extract_query_pattern(self, query: str) -> Optional[str]:
-        """Extract common patterns from queries"""
-        
-        query_lower = query.lower()
-        
-        patterns = [
-            ("pricing", "pricing_inquiry"),
-            ("apply", "application_inquiry"),
-            ("problem", "troubleshooting"),
-            ("contact", "support_request"),
-            ("feature", "product_inquiry"),
-            ("fee", "pricing_inquiry"),
-            ("rate", "pricing_inquiry"),
-            ("limit", "product_inquiry"),
-            ("approval", "application_inquiry"),
-            ("eligibility", "application_inquiry")
-        ]
-        
-        for keyword, pattern in patterns:
-            if keyword in query_lower:
-                return pattern
-        
-        return None
-    
     async def _identify_missing_information(self, query: str, response: str):
         """Identify when information is missing from responses"""
         
@@ -258,71 +305,49 @@ class RealTimeLearningService:
     async def generate_learning_report(self) -> Dict[str, Any]:
         """Generate a learning report based on recent interactions"""
         
-        recent_interactions = self.interaction_log[-100:]  # Last 100 interactions
-        
-        if not recent_interactions:
+        if not self._window:
             return {"message": "No recent interactions to analyze"}
         
-        # Analyze interaction patterns
-        total_interactions = len(recent_interactions)
-        low_confidence_count = len([i for i in recent_interactions if i.get("confidence", 0) < 0.4])
-        negative_feedback_count = len([i for i in recent_interactions if i.get("user_feedback", {}).get("rating") in [1, 2]])
-        
-        # Identify common query types
-        query_types: Dict[str, int] = defaultdict(int)
-        for interaction in recent_interactions:
-            pattern = self._extract_query_pattern(interaction.get("query", ""))
-            if pattern:
-                query_types[pattern] += 1
+        # Aggregates over the last REPORT_WINDOW interactions are maintained by log_interaction
+        total_interactions = len(self._window)
         
         # Generate improvement recommendations
-        recommendations = await self._generate_improvement_recommendations(recent_interactions)
+        recommendations = await self._generate_improvement_recommendations()
         
         return {
             "report_period": {
-                "start": recent_interactions[0]["timestamp"],
-                "end": recent_interactions[-1]["timestamp"]
+                "start": self._window[0][0],
+                "end": self._window[-1][0]
             },
             "interaction_summary": {
                 "total_interactions": total_interactions,
-                "low_confidence_rate": round(low_confidence_count / total_interactions * 100, 2),
-                "negative_feedback_rate": round(negative_feedback_count / total_interactions * 100, 2),
-                "average_confidence": round(sum(i.get("confidence", 0) for i in recent_interactions) / total_interactions, 2)
+                "low_confidence_rate": round(self._low_conf_count / total_interactions * 100, 2),
+                "negative_feedback_rate": round(self._negative_count / total_interactions * 100, 2),
+                "average_confidence": round(self._confidence_sum / total_interactions, 2)
             },
-            "query_patterns": dict(query_types),
+            "query_patterns": dict(self._pattern_counts),
             "knowledge_gaps": len(self.knowledge_gaps),
             "improvement_suggestions": len(self.improvement_suggestions),
             "recommendations": recommendations
         }
     
-    async def _generate_improvement_recommendations(self, interactions: List[Dict[str, Any]]) -> List[str]:
+    async def _generate_improvement_recommendations(self) -> List[str]:
         """Generate specific improvement recommendations"""
         
         recommendations = []
         
-        # Analyze patterns
-        low_confidence_queries = [i for i in interactions if i.get("confidence", 0) < 0.4]
-        negative_feedback_queries = [i for i in interactions if i.get("user_feedback", {}).get("rating") in [1, 2]]
-        
-        if low_confidence_queries:
+        if self._low_conf_count:
             recommendations.append("Expand knowledge base for low-confidence query types")
         
-        if negative_feedback_queries:
+        if self._negative_count:
             recommendations.append("Improve response quality for queries with negative feedback")
         
         # Check for missing information patterns
-        missing_info_count = len([i for i in interactions if "don't have" in i.get("response", "").lower()])
-        if missing_info_count > 5:
+        if self._missing_info_count > 5:
             recommendations.append("Add missing information to knowledge base")
         
         # Check for common query types that need better coverage
-        query_types: Dict[str, int] = defaultdict(int)
-        for interaction in interactions:
-            pattern = self._extract_query_pattern(interaction.get("query", ""))
-            if pattern:
-                query_types[pattern] += 1
-        
-        for query_type, count in query_types.items():
+        for query_type, count in self._pattern_counts.items():
             if count > 10:  # If a query type appears frequently
                 recommendations.append(f"Improve coverage for {query_type} queries")
         
@@ -377,7 +402,7 @@ class RealTimeLearningService:
             return {
                 "content": content,
                 "source": "ai_generated",
-                "query_type": self._extract_query_pattern(query),
+                "query_type": _extract_query_pattern(query),
                 "timestamp": datetime.utcnow().isoformat(),
                 "metadata": {
                     "generated_for_gap": True,
@@ -397,7 +422,7 @@ class RealTimeLearningService:
             
             # Prepare document for storage
             document = {
-                "id": f"learned_{hash(content['content'][:100])}",
+                "id": f"learned_{hashlib.blake2b(content['content'][:100].encode('utf-8'), digest_size=16).hexdigest()}",
                 "text": content["content"],
                 "embedding": embedding,
                 "source": content["source"],
@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 import logging
 import xml.etree.ElementTree as ET
 import hashlib
@@ -164,8 +164,8 @@ class Scraper:
                 self.visited_urls.add(url)
         # Save all results
         try:
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.scraped_data, f, indent=2)
+            with open(self.output_file, 'wb') as f:
+                f.write(orjson.dumps(self.scraped_data, option=orjson.OPT_INDENT_2))
             logging.info(f"Scraping complete. Results saved to {self.output_file}")
         except Exception as e:
             logging.error(f"Failed to save results: {e}")
@@ -231,8 +231,8 @@ class Scraper:
                 logging.error(f"Scraped data file not found: {self.output_file}")
                 return {"status": "error", "message": "Scraped data file not found"}
             
-            with open(self.output_file, 'r', encoding='utf-8') as f:
-                scraped_data = json.load(f)
+            with open(self.output_file, 'rb') as f:
+                scraped_data = orjson.loads(f.read())
             
             # Filter for successful pages with minimum content length
             quality_pages = [
@@ -245,8 +245,8 @@ class Scraper:
             # Initialize Pinecone index
             pinecone_service.initialize_index()
             
-            # Process pages in batches
-            batch_size = 10
+            # Process pages in batches; each batch is embedded with a single API request
+            batch_size = 64
             total_uploaded = 0
             failed_uploads = []
             
@@ -254,11 +254,19 @@ class Scraper:
                 batch = quality_pages[i:i + batch_size]
                 vectors = []
                 
-                for page in batch:
+                try:
+                    embeddings = await openai_service.generate_embeddings_batch([page['content'] for page in batch])
+                except Exception as e:
+                    logging.error(f"Error embedding batch {i//batch_size + 1}: {e}")
+                    failed_uploads.extend([{"url": page['url'], "error": str(e)} for page in batch])
+                    continue
+                
+                for page, embedding in zip(batch, embeddings):
+                    # Inputs are capped at the model limit; pages the API still rejects come back as None
+                    if embedding is None:
+                        failed_uploads.append({"url": page['url'], "error": "embedding failed"})
+                        continue
                     try:
-                        # Generate embedding
-                        embedding = await openai_service.generate_embeddings(page['content'])
-                        
                         # Determine content type using hybrid approach
                         content_type = self.get_content_type(
                             page['url'], 
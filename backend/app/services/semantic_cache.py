@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    """In-process cache of generated answers, looked up by question-embedding similarity within the same context"""
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.97, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+        # Fixed-size ring of unit vectors; the slot arrays are allocated on first insert once the dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._context_keys = np.zeros(max_entries, dtype=np.int64)
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._answers: List[Optional[str]] = [None] * max_entries
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _context_key(context: str) -> int:
+        return int.from_bytes(hashlib.blake2b(context.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def get(self, embedding: List[float], context: str) -> Optional[str]:
+        """Return a cached answer whose question is at least `threshold` cosine-similar and whose context matches exactly"""
+        query = self._unit(embedding)
+        with self._lock:
+            if query is None or self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                return None
+            # Similarities against every slot in one matrix-vector product; stale, empty and other-context slots are masked out
+            scores = self._vectors @ query
+            usable = (self._expires_at > time.time()) & (self._context_keys == self._context_key(context))
+            scores[~usable] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            logger.debug(f"Semantic cache hit (similarity {scores[best]:.3f})")
+            return self._answers[best]
+
+    def put(self, embedding: List[float], context: str, answer: str):
+        """Store an answer, overwriting the oldest slot once the cache is full"""
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._expires_at[:] = 0.0
+            slot = self._next_slot
+            self._vectors[slot] = vector
+            self._context_keys[slot] = self._context_key(context)
+            self._expires_at[slot] = time.time() + self.ttl_seconds
+            self._answers[slot] = answer
+            self._next_slot = (slot + 1) % self.max_entries
@@ -5,8 +5,8 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from vapi import Vapi
 from dotenv import load_dotenv
-from app.services.openai_service import OpenAIService
-from app.services.pinecone_service import PineconeService
+from app.services.openai_service import get_openai_service
+from app.services.pinecone_service import get_pinecone_service
 # Load environment variables
 load_dotenv()
 
@@ -23,8 +23,8 @@ class VapiService:
         self.vapi = Vapi(token=self.vapi_token)
         self.assistant_id = None
         self._setup_assistant()
-        self.openai_service = OpenAIService()
-        self.pinecone_service = PineconeService()
+        self.openai_service = get_openai_service()
+        self.pinecone_service = get_pinecone_service()
     
     def _setup_assistant(self):
         """Create or get the Aven AI assistant"""
@@ -176,9 +176,11 @@ Remember: You're representing Aven AI, a financial technology company."""
     async def get_knowledge_based_response(self, query: str) -> dict:
         """Answer a query using the enhanced intelligent response system."""
         try:
-            # Use the enhanced assistant service for better responses
-            from app.services.assistant_service import AssistantService
-            assistant_service = AssistantService()
+            # Use the enhanced assistant service for better responses (built once, then reused across calls)
+            if getattr(self, "_assistant_service", None) is None:
+                from app.services.assistant_service import AssistantService
+                self._assistant_service = AssistantService()
+            assistant_service = self._assistant_service
             
             # Process the query with enhanced intelligence
             response = await assistant_service.process_message(query)
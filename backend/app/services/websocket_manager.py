@@ -1,5 +1,5 @@
 import asyncio
-import json
+import orjson
 import logging
 from typing import Dict, Any, Optional, Set, List
 from datetime import datetime
@@ -162,7 +162,7 @@ class WebSocketManager:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(orjson.dumps(message).decode())
             return True
             
         except Exception as e:
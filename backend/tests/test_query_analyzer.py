@@ -0,0 +1,44 @@
+import unittest
+
+from app.services.query_analyzer import QueryAnalyzer, _KeywordMatcher, normalize_query
+
+class KeywordMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.keywords = ["latest", "latest news", "new", "news", "price", "pricing", "pricing plan"]
+        self.matcher = _KeywordMatcher(self.keywords)
+
+    def expected_count(self, text: str) -> int:
+        return sum(1 for keyword in self.keywords if keyword in text)
+
+    def test_search_matches_substrings(self):
+        self.assertTrue(self.matcher.search("what is the latest"))
+        self.assertTrue(self.matcher.search("renewal"))  # "new" inside a word, as with `in`
+        self.assertFalse(self.matcher.search("how do i apply"))
+
+    def test_count_includes_keywords_that_are_prefixes_of_a_longer_match(self):
+        for text in ["latest news", "pricing plan", "latest news on the pricing plan", "newsletter", "", "nothing here"]:
+            with self.subTest(text=text):
+                self.assertEqual(self.matcher.count(text), self.expected_count(text))
+
+    def test_regex_metacharacters_are_literal(self):
+        matcher = _KeywordMatcher(["a+b", "c.d"])
+        self.assertTrue(matcher.search("is a+b valid"))
+        self.assertFalse(matcher.search("aab or cxd"))
+
+class QueryAnalyzerTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = QueryAnalyzer()
+
+    def test_whitespace_and_case_variants_share_one_analysis(self):
+        self.assertEqual(normalize_query("  How  MUCH is it "), "how much is it")
+        first = self.analyzer.analyze_query("how  much is the fee")
+        second = self.analyzer.analyze_query("How much is the fee")
+        self.assertEqual(first, second)
+        self.assertEqual(first["query_type"], "pricing")
+
+    def test_time_entities_are_extracted_in_one_pass(self):
+        analysis = self.analyzer.analyze_query("Can we talk tomorrow at 10:30 or 3pm")
+        self.assertEqual(set(analysis["entities"]), {"tomorrow", "10:30", "3pm"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core import rate_limiter
+from app.core.rate_limiter import AsyncTokenBucket, HostRateLimiter
+
+class FakeClock:
+    """Monotonic clock that only moves when the bucket sleeps, so waits are measured exactly"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._real_sleep = asyncio.sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await self._real_sleep(0)
+
+class FakeClockTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        # Replace only the limiter module's view of time, leaving the event loop's own clock alone
+        patches = [
+            patch.object(rate_limiter, "time", SimpleNamespace(monotonic=self.clock.monotonic)),
+            patch.object(rate_limiter, "asyncio", SimpleNamespace(sleep=self.clock.sleep, Lock=asyncio.Lock)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+class AsyncTokenBucketTest(FakeClockTestCase):
+    async def test_full_bucket_allows_a_burst_without_waiting(self):
+        bucket = AsyncTokenBucket(rate=5, period=1.0)
+        for _ in range(5):
+            await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    async def test_empty_bucket_waits_for_one_token_to_refill(self):
+        bucket = AsyncTokenBucket(rate=2, period=1.0)
+        await bucket.acquire()
+        await bucket.acquire()
+        await bucket.acquire()
+        # 2 tokens per second -> the third acquisition waits half a second
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.5)
+        self.assertAlmostEqual(self.clock.now, 0.5)
+
+    async def test_tokens_refill_with_elapsed_time(self):
+        bucket = AsyncTokenBucket(rate=10, period=1.0)
+        for _ in range(10):
+            await bucket.acquire()
+        self.clock.now += 0.3
+        for _ in range(3):
+            await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    async def test_refill_is_capped_at_capacity(self):
+        bucket = AsyncTokenBucket(rate=3, period=1.0)
+        self.clock.now += 60.0
+        for _ in range(3):
+            await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        await bucket.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 1 / 3)
+
+    async def test_waiters_are_served_in_turn(self):
+        bucket = AsyncTokenBucket(rate=1, period=1.0)
+        await bucket.acquire()
+        await asyncio.gather(bucket.acquire(), bucket.acquire())
+        self.assertAlmostEqual(self.clock.now, 2.0)
+
+    async def test_amount_larger_than_capacity_is_rejected(self):
+        bucket = AsyncTokenBucket(rate=2, period=1.0)
+        with self.assertRaises(ValueError):
+            await bucket.acquire(3)
+        # The bucket stays usable for other callers
+        await bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_non_positive_rate_or_period_is_rejected(self):
+        with self.assertRaises(ValueError):
+            AsyncTokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            AsyncTokenBucket(rate=1, period=0)
+
+class HostRateLimiterTest(FakeClockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.limiter = HostRateLimiter({"trustpilot.com": 2}, default_rate=10)
+
+    async def test_subdomains_share_the_configured_domain_bucket(self):
+        await self.limiter.acquire("trustpilot.com")
+        await self.limiter.acquire("www.trustpilot.com")
+        self.assertEqual(self.clock.sleeps, [])
+        await self.limiter.acquire("uk.trustpilot.com:443")
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.5)
+
+    async def test_unconfigured_hosts_get_their_own_default_bucket(self):
+        for _ in range(2):
+            await self.limiter.acquire("trustpilot.com")
+        for _ in range(10):
+            await self.limiter.acquire("www.aven.com")
+        for _ in range(10):
+            await self.limiter.acquire("aven.com")
+        self.assertEqual(self.clock.sleeps, [])
+
+if __name__ == "__main__":
+    unittest.main()